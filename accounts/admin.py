@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Account, UserProfile, ContactMessage
+from .models import Account, UserProfile, ContactMessage, Campaign
 from django.utils.html import format_html
 
 class AccountAdmin(UserAdmin):
@@ -29,7 +29,15 @@ class ContactMessageAdmin(admin.ModelAdmin):
     readonly_fields = ('name', 'email', 'subject', 'message', 'created_at')
     list_per_page = 25
 
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'sent_count', 'created_at', 'started_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    # Progress is written by the send_campaign command only
+    readonly_fields = ('status', 'last_subscriber_id', 'sent_count', 'created_at', 'started_at', 'finished_at')
+
 
 admin.site.register(Account, AccountAdmin)
 admin.site.register(UserProfile, UserProfileAdmin)
-admin.site.register(ContactMessage, ContactMessageAdmin)
\ No newline at end of file
+admin.site.register(ContactMessage, ContactMessageAdmin)
+admin.site.register(Campaign, CampaignAdmin)
@@ -1,12 +1,13 @@
 from django.urls import path
 from .api_views import (
-    RegisterAPIView, VerifyEmailAPIView, ProfileAPIView, 
+    RegisterAPIView, VerifyEmailAPIView, LoginAPIView, ProfileAPIView, 
     ChangePasswordAPIView, ContactAPIView, NewsletterAPIView
 )
 
 urlpatterns = [
     path('register/', RegisterAPIView.as_view(), name='api-register'),
     path('verify-email/', VerifyEmailAPIView.as_view(), name='api-verify-email'),
+    path('login/', LoginAPIView.as_view(), name='api-login'),
     path('profile/', ProfileAPIView.as_view(), name='api-profile'),
     path('change-password/', ChangePasswordAPIView.as_view(), name='api-change-password'),
     path('contact/', ContactAPIView.as_view(), name='api-contact'),
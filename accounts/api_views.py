@@ -6,6 +6,10 @@ from django.template.loader import render_to_string
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import default_token_generator
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from carts.models import CartItem
+from carts.services import cart_summary, merge_carts
 
 from .models import Account
 from .serializers import (
@@ -55,6 +59,36 @@ class VerifyEmailAPIView(views.APIView):
         else:
             return Response({'error': 'Invalid or expired activation link.'}, status=status.HTTP_400_BAD_REQUEST)
 
+class LoginAPIView(views.APIView):
+    """
+    Sign-in in one round-trip: validates the credentials, issues the SimpleJWT
+    pair, merges the anonymous cart (cart_id in the body or the X-Cart-Id
+    header) into the user's cart and returns the profile and the cart summary.
+    """
+    permission_classes = [AllowAny]
+    # A stale Bearer token left in the client must not block signing in again
+    authentication_classes = []
+
+    def get_authenticate_header(self, request):
+        # Answer bad credentials with 401 like token/, not the 403 DRF uses without authenticators
+        return 'Bearer realm="api"'
+
+    def post(self, request):
+        serializer = TokenObtainPairSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+
+        cart_id = request.data.get('cart_id') or request.META.get('HTTP_X_CART_ID')
+        if cart_id:
+            merge_carts(serializer.user, cart_id)
+
+        user = Account.objects.select_related('userprofile').get(pk=serializer.user.pk)
+        return Response({
+            'access': serializer.validated_data['access'],
+            'refresh': serializer.validated_data['refresh'],
+            'user': UserSerializer(user).data,
+            'cart': cart_summary(CartItem.objects.filter(user=user, is_active=True)),
+        }, status=status.HTTP_200_OK)
+
 class ProfileAPIView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
@@ -96,6 +96,39 @@ class NewsletterSubscriber(models.Model):
 
     def __str__(self):
         return self.email
+
+
+class Campaign(models.Model):
+    """
+    A newsletter mailing to every NewsletterSubscriber, sent by the
+    send_campaign management command. ``last_subscriber_id`` is the checkpoint:
+    subscribers up to it have been mailed, so an interrupted run resumes after it.
+    """
+    DRAFT = 'draft'
+    SENDING = 'sending'
+    SENT = 'sent'
+    STATUS_CHOICES = (
+        (DRAFT, 'Draft'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+    )
+
+    subject = models.CharField(max_length=200)
+    body = models.TextField(
+        help_text='Django template, rendered once per campaign. $email and $subscribed_at are filled in per recipient.'
+    )
+    is_html = models.BooleanField(default=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=DRAFT)
+    last_subscriber_id = models.BigIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.subject
+
+
 class ContactMessage(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField()
@@ -1,3 +1,175 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from django.test.utils import CaptureQueriesContext
+
+from carts.models import Cart, CartItem
+from category.models import Category
+from store.models import Product, Variation
+from .models import Account, UserProfile, Campaign, NewsletterSubscriber
+
+
+class SessionTouchThrottlingTests(TestCase):
+    """
+    Browsing benchmark: one logged-in visitor opens 30 pages, 5 seconds apart,
+    and we count the writes that hit the session table.
+    """
+    PAGE_VIEWS = 30
+    SECONDS_BETWEEN_VIEWS = 5
+
+    def setUp(self):
+        user = Account.objects.create_user('Asha', 'Nair', 'asha', 'asha@example.com', 'secret-pass-123')
+        user.is_active = True
+        user.save()
+        self.client.force_login(user)
+
+    def _session_writes(self):
+        clock = mock.Mock()
+        with mock.patch('django_session_timeout.middleware.time', clock), \
+                CaptureQueriesContext(connection) as queries:
+            for view in range(self.PAGE_VIEWS):
+                clock.time.return_value = 1_000_000 + view * self.SECONDS_BETWEEN_VIEWS
+                self.client.get('/api/store/categories/')
+        return sum(
+            1 for query in queries.captured_queries
+            if 'django_session' in query['sql'] and not query['sql'].startswith('SELECT')
+        )
+
+    @override_settings(SESSION_EXPIRE_AFTER_LAST_ACTIVITY_GRACE_PERIOD=1)
+    def test_unthrottled_session_is_written_on_every_request(self):
+        self.assertGreaterEqual(self._session_writes(), self.PAGE_VIEWS - 1)
+
+    @override_settings(SESSION_EXPIRE_AFTER_LAST_ACTIVITY_GRACE_PERIOD=60)
+    def test_throttled_session_is_written_once_per_resolution(self):
+        # 30 views over 150 seconds -> a write at most every 60 seconds
+        self.assertLessEqual(self._session_writes(), 4)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_signed_cookie_sessions_never_touch_the_database(self):
+        self.client.logout()
+        self.client.force_login(Account.objects.get(email='asha@example.com'))
+        self.assertEqual(self._session_writes(), 0)
+
+
+@override_settings(HOME_SNAPSHOT_BACKGROUND_REFRESH=False)
+class LoginAPITests(TestCase):
+    def setUp(self):
+        self.user = Account.objects.create_user('Asha', 'Nair', 'asha', 'asha@example.com', 'secret-pass-123')
+        self.user.is_active = True
+        self.user.save()
+        UserProfile.objects.create(user=self.user, city='Kochi')
+        toys = Category.objects.create(category_name='Toys', slug='toys')
+        self.kite = Product.objects.create(product_name='Kite', slug='kite', price=20, stock=9, category=toys)
+        self.red = Variation.objects.create(product=self.kite, variation_category='color', variation_value='red')
+        self.ball = Product.objects.create(product_name='Ball', slug='ball', price=10, stock=9, category=toys)
+        self.blue = Variation.objects.create(product=self.ball, variation_category='color', variation_value='blue')
+        self.client = APIClient()
+
+    def _line(self, variation, quantity, **owner):
+        item = CartItem.objects.create(product=variation.product, quantity=quantity, **owner)
+        item.variations.add(variation)
+        return item
+
+    def _login(self, **extra):
+        return self.client.post(
+            '/api/accounts/login/', {'email': 'asha@example.com', 'password': 'secret-pass-123'}, format='json', **extra
+        )
+
+    def test_returns_tokens_profile_and_merged_cart(self):
+        existing = self._line(self.red, 1, user=self.user)
+        cart = Cart.objects.create(cart_id='anon-1')
+        self._line(self.red, 2, cart=cart)
+        moved = self._line(self.blue, 1, cart=cart)
+
+        response = self._login(HTTP_X_CART_ID='anon-1')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['access'] and data['refresh'])
+        self.assertEqual(data['user']['profile']['city'], 'Kochi')
+        self.assertEqual(data['cart']['quantity'], 4)
+        existing.refresh_from_db()
+        self.assertEqual(existing.quantity, 3)
+        moved.refresh_from_db()
+        self.assertEqual((moved.user_id, moved.cart_id), (self.user.id, None))
+        self.assertFalse(Cart.objects.filter(cart_id='anon-1').exists())
+
+    def test_cart_summary_leaves_out_inactive_lines(self):
+        self._line(self.red, 1, user=self.user)
+        self._line(self.blue, 5, user=self.user, is_active=False)
+
+        cart = self._login().json()['cart']
+        self.assertEqual(cart['quantity'], 1)
+        self.assertEqual([line['product']['id'] for line in cart['cart_items']], [self.kite.id])
+
+    def test_merge_query_count_does_not_grow_with_the_cart(self):
+        products = Product.objects.bulk_create([
+            Product(product_name=f'Toy {n}', slug=f'toy-{n}', price=5, stock=9, category=self.kite.category)
+            for n in range(5)
+        ])
+
+        def login_queries(cart_id, lines):
+            cart = Cart.objects.create(cart_id=cart_id)
+            CartItem.objects.bulk_create([CartItem(product=product, cart=cart) for product in products[:lines]])
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self._login(HTTP_X_CART_ID=cart_id).status_code, 200)
+            CartItem.objects.all().delete()
+            return len(queries)
+
+        self.assertEqual(login_queries('anon-small', 1), login_queries('anon-large', 5))
+
+    def test_rejects_bad_credentials(self):
+        response = self.client.post(
+            '/api/accounts/login/', {'email': 'asha@example.com', 'password': 'wrong'}, format='json'
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+class SendCampaignTests(TestCase):
+    def setUp(self):
+        NewsletterSubscriber.objects.bulk_create([
+            NewsletterSubscriber(email=f'reader{n}@example.com') for n in range(5)
+        ])
+        self.campaign = Campaign.objects.create(
+            subject='Summer sale', body='<p>{{ campaign.subject }} for $email</p>',
+        )
+
+    def _send(self, **options):
+        call_command('send_campaign', self.campaign.pk, batch_size=2, rate=1000, stdout=StringIO(), **options)
+        self.campaign.refresh_from_db()
+
+    def test_sends_personalised_batches_over_one_connection(self):
+        with mock.patch(
+            'accounts.management.commands.send_campaign.get_connection', wraps=mail.get_connection
+        ) as get_connection:
+            self._send()
+        get_connection.assert_called_once()
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [f'reader{n}@example.com' for n in range(5)])
+        self.assertEqual(mail.outbox[0].body, '<p>Summer sale for reader0@example.com</p>')
+        self.assertEqual(mail.outbox[0].content_subtype, 'html')
+        self.assertEqual((self.campaign.status, self.campaign.sent_count), (Campaign.SENT, 5))
+
+    def test_resumes_after_a_crash_without_resending(self):
+        send_messages = EmailBackend.send_messages
+        calls = []
+
+        def fail_on_second_batch(backend, messages):
+            calls.append(len(messages))
+            if len(calls) == 2:
+                raise ConnectionError('SMTP server went away')
+            return send_messages(backend, messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', fail_on_second_batch), \
+                self.assertRaises(ConnectionError):
+            self._send()
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.status, self.campaign.sent_count), (Campaign.SENDING, 2))
+
+        self._send()
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [f'reader{n}@example.com' for n in range(5)])
+        self.assertEqual((self.campaign.status, self.campaign.sent_count), (Campaign.SENT, 5))
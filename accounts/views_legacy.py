@@ -15,7 +15,7 @@ from .models import Account, UserProfile
 
 from orders.models import Order, OrderProduct
 from carts.models import Cart, CartItem
-from carts.views import _cart_id
+from carts.views_legacy import _cart_id
 
 import logging
 
@@ -98,7 +98,7 @@ def login(request):
 
         if user:
             try:
-                session_cart = Cart.objects.get(cart_id=_cart_id(request))
+                session_cart = Cart.objects.get(cart_id=_cart_id(request, create=False))
                 merge_cart(user, session_cart)
             except Cart.DoesNotExist:
                 pass
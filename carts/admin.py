@@ -1,4 +1,5 @@
 from django.contrib import admin
+from familyplus.pagination import LargeTablePaginator
 from .models import Cart, CartItem
 
 
@@ -7,10 +8,17 @@ class CartAdmin(admin.ModelAdmin):
     list_display = ('cart_id', 'date_added')
     search_fields = ('cart_id',)
     list_per_page = 20
+    paginator = LargeTablePaginator
+    show_full_result_count = False
 
 @admin.register(CartItem)
 class CartItemAdmin(admin.ModelAdmin):
     list_display = ('product', 'cart', 'user', 'quantity', 'is_active')
     list_filter = ('is_active',)
     search_fields = ('product__product_name', 'cart__cart_id', 'user__email')
-    list_per_page = 20
\ No newline at end of file
+    list_per_page = 20
+    # cart and user are nullable, so the admin's automatic select_related() would skip them
+    list_select_related = ('product', 'cart', 'user')
+    autocomplete_fields = ('product', 'cart', 'user', 'variations')
+    paginator = LargeTablePaginator
+    show_full_result_count = False
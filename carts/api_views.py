@@ -4,19 +4,32 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError
 from decimal import Decimal
 
 from .models import Cart, CartItem
 from store.models import Product, Variation
-from .serializers import CartResponseSerializer
+from .serializers import CartResponseSerializer, CartBatchSerializer
+from .services import cart_summary, apply_cart_operations, merge_carts
 
-def _get_cart_from_request(request):
+def _get_cart_from_request(request, create=False):
+    """
+    Resolves the anonymous cart from the X-Cart-Id header.
+    The Cart row is only created on the first add (create=True), so read-only
+    requests from browsing visitors and bots never write. A missing cart raises
+    Cart.DoesNotExist.
+    """
     if request.user.is_authenticated:
         return None
     cart_id = request.META.get('HTTP_X_CART_ID')
     if not cart_id:
         raise ValidationError({"detail": "X-Cart-Id header is required for anonymous users."})
-    cart, _ = Cart.objects.get_or_create(cart_id=cart_id)
+    if create:
+        cart, _ = Cart.objects.get_or_create(cart_id=cart_id)
+        return cart
+    cart = Cart.objects.filter(cart_id=cart_id).first()
+    if cart is None:
+        raise Cart.DoesNotExist("No cart exists for this X-Cart-Id yet.")
     return cart
 
 def _get_cart_item(user, cart, product, product_variations):
@@ -43,28 +56,44 @@ class CartDetailAPIView(views.APIView):
     def get(self, request):
         try:
             if request.user.is_authenticated:
-                cart_items = CartItem.objects.filter(user=request.user, is_active=True).select_related('product').prefetch_related('variations')
+                cart_items = CartItem.objects.filter(user=request.user, is_active=True)
             else:
                 cart = _get_cart_from_request(request)
-                cart_items = CartItem.objects.filter(cart=cart, is_active=True).select_related('product').prefetch_related('variations')
-                
-            total = sum(item.product.price * Decimal(item.quantity) for item in cart_items)
-            quantity = sum(item.quantity for item in cart_items)
-            shipping = Decimal(40)
-            grand_total = total + shipping
+                cart_items = CartItem.objects.filter(cart=cart, is_active=True)
+            return Response(cart_summary(cart_items))
         except (ObjectDoesNotExist, ValidationError):
-            cart_items = []
-            total = quantity = shipping = grand_total = Decimal(0)
-
-        data = {
-            'cart_items': cart_items,
-            'total': total,
-            'shipping': shipping,
-            'grand_total': grand_total,
-            'quantity': quantity
-        }
-        serializer = CartResponseSerializer(data)
-        return Response(serializer.data)
+            return Response(CartResponseSerializer({
+                'cart_items': [], 'total': Decimal(0), 'shipping': Decimal(0), 'grand_total': Decimal(0), 'quantity': 0
+            }).data)
+
+    def patch(self, request):
+        """
+        Applies a batch of line operations in one transaction and returns the updated cart:
+        {"operations": [{"op": "add"|"set"|"remove", "cart_item_id": 1} or
+                        {"op": ..., "product_id": 2, "variations": {"color": "red"}, "quantity": 3}, ...]}
+        """
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data['operations']
+
+        user = request.user if request.user.is_authenticated else None
+        # Like the add endpoint, only a batch that may add lines creates the anonymous cart
+        adds_lines = any(op['op'] != 'remove' and op['quantity'] > 0 for op in operations)
+        try:
+            cart = _get_cart_from_request(request, create=adds_lines)
+        except Cart.DoesNotExist:
+            return Response({"error": "Item not found in cart."}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            apply_cart_operations(operations, user=user, cart=cart)
+        except IntegrityError:
+            # Anonymous carts hold one line per product (CartItem.unique_together)
+            return Response(
+                {"error": "This cart already holds the product with other variations."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        cart_items = CartItem.objects.filter(user=user, is_active=True) if user else CartItem.objects.filter(cart=cart, is_active=True)
+        return Response(cart_summary(cart_items))
 
 class CartItemAddAPIView(views.APIView):
     permission_classes = [AllowAny]
@@ -82,7 +111,7 @@ class CartItemAddAPIView(views.APIView):
             except Variation.DoesNotExist:
                 continue
 
-        cart = _get_cart_from_request(request)
+        cart = _get_cart_from_request(request, create=True)
         user = request.user if request.user.is_authenticated else None
 
         cart_item, exists = _get_cart_item(user, cart, product, product_variation)
@@ -99,6 +128,8 @@ class CartItemAddAPIView(views.APIView):
             )
             if product_variation:
                 cart_item.variations.add(*product_variation)
+        if cart is not None:
+            cart.touch()
                 
         return Response({"message": "Item added to cart."}, status=status.HTTP_200_OK)
 
@@ -120,7 +151,7 @@ class CartItemDecreaseAPIView(views.APIView):
             else:
                 cart_item.delete()
             return Response({"message": "Item quantity decreased."}, status=status.HTTP_200_OK)
-        except CartItem.DoesNotExist:
+        except (Cart.DoesNotExist, CartItem.DoesNotExist):
             return Response({"error": "Item not found in cart."}, status=status.HTTP_404_NOT_FOUND)
 
 class CartItemRemoveAPIView(views.APIView):
@@ -137,7 +168,7 @@ class CartItemRemoveAPIView(views.APIView):
                 
             cart_item.delete()
             return Response({"message": "Item removed from cart."}, status=status.HTTP_200_OK)
-        except CartItem.DoesNotExist:
+        except (Cart.DoesNotExist, CartItem.DoesNotExist):
             return Response({"error": "Item not found in cart."}, status=status.HTTP_404_NOT_FOUND)
 
 class CartMergeAPIView(views.APIView):
@@ -148,31 +179,6 @@ class CartMergeAPIView(views.APIView):
         if not cart_id:
             return Response({"error": "cart_id or X-Cart-Id header is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            session_cart = Cart.objects.get(cart_id=cart_id)
-            user = request.user
-            
-            session_items = CartItem.objects.filter(cart=session_cart).prefetch_related('variations')
-            user_items = CartItem.objects.filter(user=user).prefetch_related('variations')
-
-            for session_item in session_items:
-                session_variations = list(session_item.variations.all())
-                matched = False
-                for user_item in user_items:
-                    user_variations = list(user_item.variations.all())
-                    if session_item.product == user_item.product and session_variations == user_variations:
-                        user_item.quantity += session_item.quantity
-                        user_item.save()
-                        matched = True
-                        break
-                if not matched:
-                    session_item.user = user
-                    session_item.cart = None
-                    session_item.save()
-            
-            # Clean up the old session cart
-            session_cart.delete()
-            
-            return Response({"message": "Cart merged successfully."}, status=status.HTTP_200_OK)
-        except Cart.DoesNotExist:
+        if merge_carts(request.user, cart_id) is None:
             return Response({"message": "No anonymous cart found to merge."}, status=status.HTTP_200_OK)
+        return Response({"message": "Cart merged successfully."}, status=status.HTTP_200_OK)
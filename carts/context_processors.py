@@ -1,4 +1,4 @@
-from .views import _cart_id
+from .views_legacy import _cart_id
 from .models import Cart, CartItem
 
 def counter(request):
@@ -12,7 +12,8 @@ def counter(request):
         if request.user.is_authenticated:
             cart_items = CartItem.objects.filter(user=request.user, is_active=True)
         else:
-            cart = Cart.objects.filter(cart_id=_cart_id(request)).first()
+            cart_id = _cart_id(request, create=False)
+            cart = Cart.objects.filter(cart_id=cart_id).first() if cart_id else None
             if cart:
                 cart_items = CartItem.objects.filter(cart=cart, is_active=True)
             else:
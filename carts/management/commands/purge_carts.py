@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from carts.models import Cart, CartItem
+
+
+class Command(BaseCommand):
+    """
+    Django management command to clean up anonymous carts.
+
+    Deletes carts that never received an item (after a short grace period),
+    anonymous carts nobody has added to or changed within the retention
+    window, and orphaned cart items that belong to neither a cart nor a user. Rows are removed in small
+    batches so each transaction stays short.
+    """
+    help = 'Bulk-purges empty and expired anonymous carts and their items in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Delete anonymous carts unused for this many days (default: 30).')
+        parser.add_argument('--empty-grace-hours', type=int, default=1, help='Keep empty carts younger than this many hours (default: 1).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of carts deleted per transaction (default: 1000).')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch_size = options['batch_size']
+
+        expired = Cart.objects.filter(last_activity__lt=now - timedelta(days=options['days']))
+        empty = Cart.objects.filter(
+            date_added__lt=now - timedelta(hours=options['empty_grace_hours']),
+            cartitem__isnull=True,
+        )
+        expired_count = self._purge_carts(expired, batch_size)
+        empty_count = self._purge_carts(empty, batch_size)
+
+        orphans = CartItem.objects.filter(cart__isnull=True, user__isnull=True)
+        orphan_count = 0
+        while True:
+            ids = list(orphans.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            CartItem.objects.filter(pk__in=ids).delete()
+            orphan_count += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Purged {expired_count} expired carts, {empty_count} empty carts '
+            f'and {orphan_count} orphaned cart items.'
+        ))
+
+    def _purge_carts(self, queryset, batch_size):
+        deleted = 0
+        while True:
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            with transaction.atomic():
+                CartItem.objects.filter(cart_id__in=ids).delete()
+                Cart.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
@@ -0,0 +1,24 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_date_added(apps, schema_editor):
+    Cart = apps.get_model('carts', 'Cart')
+    Cart.objects.update(last_activity=models.F('date_added'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carts', '0002_cart_date_added_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='last_activity',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        # Existing carts have not been touched since they were created, as far as we know
+        migrations.RunPython(copy_date_added, migrations.RunPython.noop),
+    ]
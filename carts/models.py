@@ -1,12 +1,20 @@
 from decimal import Decimal
 from django.db import models
+from django.utils import timezone
 from store.models import Product, Variation
 from accounts.models import Account
 
 
 class Cart(models.Model):
     cart_id = models.CharField(max_length=250, blank=True)
-    date_added = models.DateTimeField(auto_now_add=True)
+    date_added = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Moved forward by every write to the cart's lines; purge_carts expires on it
+    last_activity = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def touch(self):
+        """Records that the cart was just used, without rewriting the rest of the row."""
+        self.last_activity = timezone.now()
+        Cart.objects.filter(pk=self.pk).update(last_activity=self.last_activity)
 
     def __str__(self):
         return self.cart_id
@@ -0,0 +1,87 @@
+"""
+Cart pricing shared by the cart summary, checkout and payment.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from django.conf import settings
+
+from .models import CartItem
+
+
+def get_shipping_charge():
+    return Decimal(settings.CART_SHIPPING_CHARGE)
+
+
+def cart_totals(cart_items):
+    """
+    Totals for cart items that were fetched with select_related('product').
+    Returns (total, quantity, shipping, grand_total).
+    """
+    total = sum((item.product.price * Decimal(item.quantity) for item in cart_items), Decimal(0))
+    quantity = sum(item.quantity for item in cart_items)
+    shipping = get_shipping_charge()
+    return total, quantity, shipping, total + shipping
+
+
+def price_cart(cart_items):
+    """
+    Prices a CartItem queryset with one query for the lines (joined to the
+    product price) and one for their variations, and returns a priced-cart
+    snapshot:
+
+        {'lines': [{'cart_item_id', 'product_id', 'quantity', 'unit_price',
+                    'line_total', 'variation_ids'}, ...],
+         'total', 'quantity', 'shipping', 'grand_total'}
+
+    Checkout stores it on the Order so the payment step can create the order
+    lines without re-reading the cart. Amounts are Decimals (strings once the
+    snapshot has been saved to JSON); wrap them in Decimal() when reading.
+    """
+    rows = list(cart_items.order_by('id').values_list('id', 'product_id', 'quantity', 'product__price'))
+
+    variation_ids = {}
+    if rows:
+        through = CartItem.variations.through.objects.filter(cartitem_id__in=[row[0] for row in rows])
+        for cart_item_id, variation_id in through.values_list('cartitem_id', 'variation_id'):
+            variation_ids.setdefault(cart_item_id, []).append(variation_id)
+
+    lines = []
+    total = Decimal(0)
+    quantity = 0
+    for cart_item_id, product_id, line_quantity, unit_price in rows:
+        line_total = unit_price * line_quantity
+        lines.append({
+            'cart_item_id': cart_item_id,
+            'product_id': product_id,
+            'quantity': line_quantity,
+            'unit_price': unit_price,
+            'line_total': line_total,
+            'variation_ids': sorted(variation_ids.get(cart_item_id, [])),
+        })
+        total += line_total
+        quantity += line_quantity
+
+    shipping = get_shipping_charge()
+    return {
+        'lines': lines,
+        'total': total,
+        'quantity': quantity,
+        'shipping': shipping,
+        'grand_total': total + shipping,
+    }
+
+
+def cart_fingerprint(priced_cart):
+    """
+    SHA-256 of what a priced cart charges for: products, quantities, unit
+    prices, variations and totals (not the cart line ids). Equal fingerprints
+    mean an order created from one can be paid for the other.
+    """
+    lines = sorted(
+        (line['product_id'], line['quantity'], str(line['unit_price']), sorted(line['variation_ids']))
+        for line in priced_cart['lines']
+    )
+    payload = json.dumps([lines, str(priced_cart['shipping']), str(priced_cart['grand_total'])])
+    return hashlib.sha256(payload.encode()).hexdigest()
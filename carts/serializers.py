@@ -23,3 +23,20 @@ class CartResponseSerializer(serializers.Serializer):
     shipping = serializers.DecimalField(max_digits=10, decimal_places=2)
     grand_total = serializers.DecimalField(max_digits=10, decimal_places=2)
     quantity = serializers.IntegerField()
+
+class CartOperationSerializer(serializers.Serializer):
+    """One line operation of a PATCH /api/cart/ batch."""
+    op = serializers.ChoiceField(choices=['add', 'set', 'remove'])
+    cart_item_id = serializers.IntegerField(required=False)
+    product_id = serializers.IntegerField(required=False)
+    # {"color": "red", "size": "M"}, used with product_id
+    variations = serializers.DictField(child=serializers.CharField(), required=False, default=dict)
+    quantity = serializers.IntegerField(min_value=0, max_value=1000, default=1)
+
+    def validate(self, data):
+        if ('cart_item_id' in data) == ('product_id' in data):
+            raise serializers.ValidationError("Give either cart_item_id or product_id.")
+        return data
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=100)
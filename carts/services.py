@@ -0,0 +1,165 @@
+"""
+Cart operations shared by the cart API views.
+"""
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from store.models import Product, Variation
+from .models import Cart, CartItem
+from .pricing import cart_totals
+from .serializers import CartResponseSerializer
+
+
+def cart_summary(cart_items):
+    """Serialized cart (lines, totals and quantity) for a CartItem queryset; three queries."""
+    cart_items = list(cart_items.select_related('product').prefetch_related('variations'))
+    total, quantity, shipping, grand_total = cart_totals(cart_items)
+    return CartResponseSerializer({
+        'cart_items': cart_items,
+        'total': total,
+        'shipping': shipping,
+        'grand_total': grand_total,
+        'quantity': quantity,
+    }).data
+
+
+def _owner_filter(user, cart):
+    return {'user': user} if user is not None else {'cart': cart}
+
+
+def _variation_sets(cart_item_ids):
+    """{cart_item_id: set(variation ids)} for the given lines; one query."""
+    variation_ids = {}
+    through = CartItem.variations.through.objects.filter(cartitem_id__in=cart_item_ids)
+    for cart_item_id, variation_id in through.values_list('cartitem_id', 'variation_id'):
+        variation_ids.setdefault(cart_item_id, set()).add(variation_id)
+    return variation_ids
+
+
+def apply_cart_operations(operations, user=None, cart=None):
+    """
+    Applies validated line operations (see CartOperationSerializer) to a user's
+    or an anonymous cart in one transaction and returns the changed line count.
+
+    A line is addressed by ``cart_item_id`` or by ``product_id`` plus its
+    ``variations`` ({category: value}, unknown pairs are ignored like the
+    single-item add endpoint does). Operations run in order against an
+    in-memory copy of the cart, then the result is written with one DELETE,
+    one bulk UPDATE and one bulk INSERT (plus the variation links), whatever the
+    number of operations.
+    """
+    owner = _owner_filter(user, cart)
+    with transaction.atomic():
+        # Existing lines, locked against concurrent batches on the same cart
+        rows = list(CartItem.objects.select_for_update().filter(**owner).values_list('id', 'product_id', 'quantity'))
+        variation_ids = _variation_sets([row[0] for row in rows])
+
+        lines = {}  # (product_id, frozenset(variation ids)) -> {'id', 'quantity'}
+        keys_by_id = {}
+        for cart_item_id, product_id, quantity in rows:
+            key = (product_id, frozenset(variation_ids.get(cart_item_id, ())))
+            lines[key] = {'id': cart_item_id, 'quantity': quantity}
+            keys_by_id[cart_item_id] = key
+        original = {line['id']: line['quantity'] for line in lines.values()}
+
+        product_ids = {op['product_id'] for op in operations if 'product_id' in op}
+        products = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+        variation_lookup = {
+            (product_id, category.lower(), value.lower()): variation_id
+            for variation_id, product_id, category, value in Variation.objects.filter(
+                product_id__in=products
+            ).values_list('id', 'product_id', 'variation_category', 'variation_value')
+        }
+
+        for index, op in enumerate(operations):
+            if 'cart_item_id' in op:
+                key = keys_by_id.get(op['cart_item_id'])
+                if key is None:
+                    raise ValidationError({'operations': {index: 'Item not found in cart.'}})
+            else:
+                product_id = op['product_id']
+                if product_id not in products:
+                    raise ValidationError({'operations': {index: f'Product {product_id} does not exist.'}})
+                selected = (
+                    variation_lookup.get((product_id, category.lower(), str(value).lower()))
+                    for category, value in op['variations'].items()
+                )
+                key = (product_id, frozenset(v for v in selected if v is not None))
+
+            line = lines.setdefault(key, {'id': None, 'quantity': 0})
+            if op['op'] == 'add':
+                line['quantity'] += op['quantity']
+            elif op['op'] == 'set':
+                line['quantity'] = op['quantity']
+            else:
+                line['quantity'] = 0
+
+        to_delete = [line['id'] for line in lines.values() if line['id'] and line['quantity'] <= 0]
+        to_update = [
+            CartItem(id=line['id'], quantity=line['quantity'])
+            for line in lines.values()
+            if line['id'] and line['quantity'] > 0 and line['quantity'] != original[line['id']]
+        ]
+        new_lines = [(key, line) for key, line in lines.items() if not line['id'] and line['quantity'] > 0]
+
+        if to_delete:
+            CartItem.objects.filter(id__in=to_delete).delete()
+        CartItem.objects.bulk_update(to_update, ['quantity'])
+        created = CartItem.objects.bulk_create([
+            CartItem(product_id=product_id, quantity=line['quantity'], **owner)
+            for (product_id, _), line in new_lines
+        ])
+        CartItem.variations.through.objects.bulk_create([
+            CartItem.variations.through(cartitem_id=item.id, variation_id=variation_id)
+            for item, ((_, variations), _) in zip(created, new_lines)
+            for variation_id in variations
+        ])
+        if cart is not None:
+            cart.touch()
+    return len(to_delete) + len(to_update) + len(created)
+
+
+def merge_carts(user, cart_id):
+    """
+    Moves the anonymous cart ``cart_id`` into ``user``'s cart and deletes it;
+    returns the number of merged lines, or None when there is no such cart.
+
+    Lines are matched on product plus the exact set of variations. Matching
+    user lines get the anonymous quantity added (one bulk UPDATE), the other
+    anonymous lines are re-owned with a single UPDATE, and the leftovers are
+    removed with the cart, so the query count does not grow with the cart.
+    """
+    cart = Cart.objects.filter(cart_id=cart_id).first()
+    if cart is None:
+        return None
+    with transaction.atomic():
+        rows = list(CartItem.objects.select_for_update().filter(
+            Q(user=user) | Q(cart=cart)
+        ).values_list('id', 'product_id', 'quantity', 'user_id'))
+        variation_ids = _variation_sets([row[0] for row in rows])
+
+        user_lines = {}
+        session_lines = []
+        for cart_item_id, product_id, quantity, owner_id in rows:
+            key = (product_id, frozenset(variation_ids.get(cart_item_id, ())))
+            if owner_id == user.pk:
+                user_lines[key] = CartItem(id=cart_item_id, quantity=quantity)
+            else:
+                session_lines.append((key, cart_item_id, quantity))
+
+        to_move = []
+        merged = set()
+        for key, cart_item_id, quantity in session_lines:
+            if key in user_lines:
+                user_lines[key].quantity += quantity
+                merged.add(key)
+            else:
+                to_move.append(cart_item_id)
+
+        CartItem.objects.bulk_update([user_lines[key] for key in merged], ['quantity'])
+        if to_move:
+            CartItem.objects.filter(id__in=to_move).update(user=user, cart=None)
+        # Cascades to the lines that were added to existing user lines
+        Cart.objects.filter(id=cart.id).delete()
+    return len(session_lines)
@@ -1,3 +1,133 @@
+from io import StringIO
+from datetime import timedelta
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import Account
+from category.models import Category
+from store.models import Product, Variation
+from .models import Cart, CartItem
+
+
+class CartTestMixin:
+    def setUp(self):
+        category = Category.objects.create(category_name='Toys', slug='toys')
+        self.product = Product.objects.create(
+            product_name='Ball', slug='ball', price=10, stock=5, category=category,
+        )
+        self.headers = {'HTTP_X_CART_ID': 'visitor-1'}
+
+
+class AnonymousCartTests(CartTestMixin, TestCase):
+    def test_reading_cart_does_not_create_rows(self):
+        response = self.client.get('/api/cart/', **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['quantity'], 0)
+        self.assertFalse(Cart.objects.exists())
+
+    def test_decrease_on_unknown_cart_is_not_found(self):
+        response = self.client.post(f'/api/cart/decrease/{self.product.id}/1/', **self.headers)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Cart.objects.exists())
+
+    def test_first_add_creates_cart(self):
+        self.client.post(f'/api/cart/add/{self.product.id}/', **self.headers)
+        self.assertEqual(Cart.objects.filter(cart_id='visitor-1').count(), 1)
+        response = self.client.get('/api/cart/', **self.headers)
+        self.assertEqual(response.json()['quantity'], 1)
+
+
+class PurgeCartsCommandTests(CartTestMixin, TestCase):
+    def test_purges_empty_and_expired_carts(self):
+        old = timezone.now() - timedelta(days=60)
+        empty = Cart.objects.create(cart_id='empty')
+        expired = Cart.objects.create(cart_id='expired')
+        fresh = Cart.objects.create(cart_id='fresh')
+        CartItem.objects.create(cart=expired, product=self.product)
+        CartItem.objects.create(cart=fresh, product=self.product)
+        Cart.objects.filter(pk__in=[empty.pk, expired.pk]).update(date_added=old, last_activity=old)
+
+        call_command('purge_carts', batch_size=1, stdout=StringIO())
+
+        self.assertEqual(list(Cart.objects.values_list('cart_id', flat=True)), ['fresh'])
+        self.assertEqual(CartItem.objects.count(), 1)
+
+    def test_old_cart_used_recently_is_kept(self):
+        old = timezone.now() - timedelta(days=60)
+        self.client.post(f'/api/cart/add/{self.product.id}/', **self.headers)
+        Cart.objects.update(date_added=old, last_activity=old)
+        self.client.post(f'/api/cart/add/{self.product.id}/', **self.headers)
+
+        call_command('purge_carts', batch_size=1, stdout=StringIO())
+
+        cart = Cart.objects.get(cart_id='visitor-1')
+        self.assertEqual(cart.cartitem_set.get().quantity, 2)
+
+
+class CartBatchTests(CartTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.kite = Product.objects.create(product_name='Kite', slug='kite', price=25, stock=5, category=self.product.category)
+        self.red = Variation.objects.create(product=self.kite, variation_category='color', variation_value='red')
+        self.blue = Variation.objects.create(product=self.kite, variation_category='color', variation_value='blue')
+        self.user = Account.objects.create_user('Asha', 'Nair', 'asha', 'asha@example.com', 'secret-pass-123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _patch(self, *operations):
+        return self.client.patch('/api/cart/', {'operations': list(operations)}, format='json')
+
+    def test_batch_applies_operations_in_order_and_returns_summary(self):
+        ball = CartItem.objects.create(user=self.user, product=self.product, quantity=4)
+        response = self._patch(
+            {'op': 'add', 'product_id': self.kite.id, 'variations': {'Color': 'RED'}, 'quantity': 2},
+            {'op': 'add', 'product_id': self.kite.id, 'variations': {'color': 'blue'}},
+            {'op': 'add', 'product_id': self.kite.id, 'variations': {'color': 'red'}},
+            {'op': 'set', 'cart_item_id': ball.id, 'quantity': 1},
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        # 1 x 10 + 3 x 25 + 1 x 25, plus 40 shipping
+        self.assertEqual((data['quantity'], data['total'], data['grand_total']), (5, '110.00', '150.00'))
+        lines = {
+            tuple(v['variation_value'] for v in item['variations']): item['quantity']
+            for item in data['cart_items']
+        }
+        self.assertEqual(lines, {(): 1, ('red',): 3, ('blue',): 1})
+
+        response = self._patch({'op': 'remove', 'cart_item_id': ball.id}, {'op': 'set', 'product_id': self.kite.id, 'variations': {'color': 'blue'}, 'quantity': 0})
+        self.assertEqual(response.json()['quantity'], 3)
+        self.assertEqual(CartItem.objects.filter(user=self.user).count(), 1)
+
+    def test_query_count_does_not_grow_with_operations(self):
+        operations = [
+            {'op': 'add', 'product_id': product.id, 'quantity': 1}
+            for product in [self.product, self.kite]
+        ]
+        self._patch(*operations)
+        # savepoint, lines, their variations, products, variations, bulk update, release, summary (2)
+        with self.assertNumQueries(9):
+            self._patch(*operations)
+        with self.assertNumQueries(9):
+            self._patch(*(operations * 20))
+        self.assertEqual(CartItem.objects.get(user=self.user, product=self.kite).quantity, 22)
+
+    def test_invalid_batch_changes_nothing(self):
+        response = self._patch(
+            {'op': 'add', 'product_id': self.product.id},
+            {'op': 'remove', 'cart_item_id': 999},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_anonymous_batch_creates_cart_and_reports_variation_conflicts(self):
+        client = APIClient()
+        response = client.patch('/api/cart/', {'operations': [{'op': 'add', 'product_id': self.kite.id, 'variations': {'color': 'red'}}]}, format='json', **self.headers)
+        self.assertEqual(response.json()['quantity'], 1)
+        self.assertEqual(Cart.objects.filter(cart_id='visitor-1').count(), 1)
 
-# Create your tests here.
+        response = client.patch('/api/cart/', {'operations': [{'op': 'add', 'product_id': self.kite.id, 'variations': {'color': 'blue'}}]}, format='json', **self.headers)
+        self.assertEqual(response.status_code, 409)
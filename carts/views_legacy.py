@@ -1,15 +1,18 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from store.models import Product, Variation
 from .models import Cart, CartItem
+from .pricing import cart_totals
 from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.auth.decorators import login_required
 from decimal import Decimal
 
 
-def _cart_id(request):
+def _cart_id(request, create=True):
+    # Read-only callers pass create=False so browsing visitors don't get a DB session
     cart = request.session.session_key
-    if not cart:
-        cart = request.session.create()
+    if not cart and create:
+        request.session.create()
+        cart = request.session.session_key
     return cart
 
 def _get_cart_item(user, cart, product, product_variations):
@@ -61,6 +64,8 @@ def add_cart(request, product_id):
         )
         if product_variation:
             cart_item.variations.add(*product_variation)
+    if cart is not None:
+        cart.touch()
     return redirect('carts:cart')
 
 def remove_cart(request, product_id, cart_item_id):
@@ -69,7 +74,7 @@ def remove_cart(request, product_id, cart_item_id):
         if request.user.is_authenticated:
             cart_item = CartItem.objects.get(product=product, user=request.user, id=cart_item_id)
         else:
-            cart = Cart.objects.get(cart_id=_cart_id(request))
+            cart = Cart.objects.get(cart_id=_cart_id(request, create=False))
             cart_item = CartItem.objects.get(product=product, cart=cart, id=cart_item_id)
         if cart_item.quantity > 1:
             cart_item.quantity -= 1
@@ -86,28 +91,21 @@ def remove_cart_item(request, product_id, cart_item_id):
         if request.user.is_authenticated:
             cart_item = CartItem.objects.get(product=product, user=request.user, id=cart_item_id)
         else:
-            cart = Cart.objects.get(cart_id=_cart_id(request))
+            cart = Cart.objects.get(cart_id=_cart_id(request, create=False))
             cart_item = CartItem.objects.get(product=product, cart=cart, id=cart_item_id)
         cart_item.delete()
     except CartItem.DoesNotExist:
         pass
     return redirect('carts:cart')
 
-def _calculate_cart_totals(cart_items):
-    total = sum(item.product.price * Decimal(item.quantity) for item in cart_items)
-    quantity = sum(item.quantity for item in cart_items)
-    shipping = Decimal(40)  # move to settings.py for production
-    grand_total = total + shipping
-    return total, quantity, shipping, grand_total
-
 def cart(request):
     try:
         if request.user.is_authenticated:
-            cart_items = CartItem.objects.filter(user=request.user, is_active=True)
+            cart_items = CartItem.objects.filter(user=request.user, is_active=True).select_related('product')
         else:
-            cart = Cart.objects.get(cart_id=_cart_id(request))
-            cart_items = CartItem.objects.filter(cart=cart, is_active=True)
-        total, quantity, shipping, grand_total = _calculate_cart_totals(cart_items)
+            cart = Cart.objects.get(cart_id=_cart_id(request, create=False))
+            cart_items = CartItem.objects.filter(cart=cart, is_active=True).select_related('product')
+        total, quantity, shipping, grand_total = cart_totals(cart_items)
     except ObjectDoesNotExist:
         cart_items = []
         total = quantity = shipping = grand_total = Decimal(0)
@@ -123,8 +121,8 @@ def cart(request):
 @login_required(login_url='login')
 def checkout(request):
     try:
-        cart_items = CartItem.objects.filter(user=request.user, is_active=True)
-        total, quantity, shipping, grand_total = _calculate_cart_totals(cart_items)
+        cart_items = CartItem.objects.filter(user=request.user, is_active=True).select_related('product')
+        total, quantity, shipping, grand_total = cart_totals(cart_items)
     except ObjectDoesNotExist:
         cart_items = []
         total = quantity = shipping = grand_total = Decimal(0)
@@ -32,28 +32,15 @@ export const AuthProvider = ({ children }) => {
 
     const login = async (email, password) => {
         try {
-            // 1. Get the tokens
-            const tokenResponse = await api.post('token/', { email, password });
-            const { access, refresh } = tokenResponse.data;
-            
-            // 2. Save tokens to localStorage
+            // One request: tokens, profile and the anonymous cart merged into the user's cart
+            const cartId = localStorage.getItem('cart_id');
+            const response = await api.post('accounts/login/', { email, password, cart_id: cartId });
+            const { access, refresh, user: profile } = response.data;
+
             localStorage.setItem('access_token', access);
             localStorage.setItem('refresh_token', refresh);
-            
-            // 3. Fetch user profile data
-            const profileResponse = await api.get('accounts/profile/');
-            setUser(profileResponse.data);
-
-            // 4. (Optional but recommended) Trigger the Cart Merge API
-            const cartId = localStorage.getItem('cart_id');
-            if (cartId) {
-                try {
-                    await api.post('cart/merge/', { cart_id: cartId });
-                    localStorage.removeItem('cart_id'); // Clean up local cart ID
-                } catch (err) {
-                    console.error("Cart merge failed:", err);
-                }
-            }
+            localStorage.removeItem('cart_id');
+            setUser(profile);
 
             return { success: true };
         } catch (error) {
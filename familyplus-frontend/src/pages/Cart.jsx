@@ -24,41 +24,23 @@ const Cart = () => {
         fetchCart();
     }, [fetchCart]);
 
-    const mapVariations = (variations) => {
-        const mapped = {};
-        variations.forEach(v => {
-            mapped[v.variation_category.toLowerCase()] = v.variation_value;
-        });
-        return mapped;
-    };
-
-    const increaseQuantity = async (item) => {
+    // Every change is one PATCH that returns the updated cart, so no refetch is needed
+    const updateCart = async (operations) => {
         try {
-            const variations = mapVariations(item.variations);
-            await api.post(`cart/add/${item.product.id}/`, { variations });
-            fetchCart();
+            const response = await api.patch('cart/', { operations });
+            setCartData(response.data);
+            setError(null);
         } catch (err) {
-            console.error("Error increasing quantity:", err);
-        }
-    };
-
-    const decreaseQuantity = async (item) => {
-        try {
-            await api.post(`cart/decrease/${item.product.id}/${item.id}/`);
+            console.error("Error updating cart:", err);
             fetchCart();
-        } catch (err) {
-            console.error("Error decreasing quantity:", err);
         }
     };
 
-    const removeItem = async (item) => {
-        try {
-            await api.delete(`cart/remove/${item.product.id}/${item.id}/`);
-            fetchCart();
-        } catch (err) {
-            console.error("Error removing item:", err);
-        }
-    };
+    const increaseQuantity = (item) => updateCart([{ op: 'add', cart_item_id: item.id }]);
+
+    const decreaseQuantity = (item) => updateCart([{ op: 'set', cart_item_id: item.id, quantity: item.quantity - 1 }]);
+
+    const removeItem = (item) => updateCart([{ op: 'remove', cart_item_id: item.id }]);
 
     if (loading) {
         return (
@@ -14,19 +14,14 @@ const ProductDetail = () => {
     useEffect(() => {
         const fetchProduct = async () => {
             try {
-                // Fetch the list of products and find by slug
-                // Note: Ideally, a dedicated endpoint like `/store/products/${slug}/` would be better for performance,
-                // but based on current DRF setup, we filter the list.
-                const response = await api.get('store/products/');
-                const products = response.data.results || response.data;
-                const foundProduct = products.find(p => p.slug === slug);
-
-                if (foundProduct) {
-                    setProduct(foundProduct);
-                } else {
+                // One request returns the product with its gallery, variations and first reviews
+                const response = await api.get(`store/products/by-slug/${slug}/`);
+                setProduct(response.data);
+            } catch (err) {
+                if (err.response?.status === 404) {
                     setError("Product not found.");
+                    return;
                 }
-            } catch (err) {
                 console.error("Error fetching product:", err);
                 setError("Failed to load product details.");
             } finally {
@@ -6,14 +6,16 @@ const Store = () => {
     const [products, setProducts] = useState([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
+    const [nextPage, setNextPage] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     useEffect(() => {
         const fetchProducts = async () => {
             try {
-                // Fetch from the Django DRF endpoint
-                // DRF typically paginates responses. If so, data is in response.data.results
+                // The endpoint is paginated: one page of results plus the URL of the next page
                 const response = await api.get('store/products/');
-                setProducts(response.data.results || response.data);
+                setProducts(response.data.results);
+                setNextPage(response.data.next);
                 setLoading(false);
             } catch (err) {
                 console.error("Error fetching products:", err);
@@ -25,6 +27,19 @@ const Store = () => {
         fetchProducts();
     }, []);
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const response = await api.get(nextPage);
+            setProducts(previous => [...previous, ...response.data.results]);
+            setNextPage(response.data.next);
+        } catch (err) {
+            console.error("Error fetching more products:", err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     if (loading) {
         return (
             <div className="flex justify-center items-center min-h-[60vh]">
@@ -57,6 +72,18 @@ const Store = () => {
                     ))}
                 </div>
             )}
+
+            {nextPage && (
+                <div className="mt-10 text-center">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="px-6 py-3 rounded-md bg-blue-600 text-white font-semibold hover:bg-blue-700 disabled:opacity-50"
+                    >
+                        {loadingMore ? 'Loading...' : 'Load more'}
+                    </button>
+                </div>
+            )}
         </div>
     );
 };
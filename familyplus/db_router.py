@@ -0,0 +1,100 @@
+"""
+Database routing between the primary and the optional read replicas.
+
+Reads are only sent to a replica inside ``use_read_replica()`` (see
+``ReadReplicaMixin``) and only while the request is not pinned to the primary.
+Any write inside a ``routing_scope()`` pins the rest of the request, and
+``ReplicaPinningMiddleware`` keeps the client pinned for
+``DATABASE_REPLICA_PIN_SECONDS`` afterwards so cart and checkout flows always
+read their own writes.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY_DB = 'default'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_pinned = ContextVar('pinned_to_primary', default=False)
+_wrote = ContextVar('wrote_to_primary', default=False)
+_in_scope = ContextVar('in_routing_scope', default=False)
+
+
+def get_replica_aliases():
+    return [alias for alias in getattr(settings, 'DATABASE_REPLICAS', []) if alias != PRIMARY_DB]
+
+
+def pin_to_primary():
+    _pinned.set(True)
+
+
+def has_written():
+    return _wrote.get()
+
+
+@contextmanager
+def use_read_replica():
+    """Allow reads in this block to go to a replica. Also usable as a view decorator."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def routing_scope():
+    """Start every request unpinned, whatever the worker thread did before."""
+    tokens = [
+        (_replica_reads, _replica_reads.set(False)), (_pinned, _pinned.set(False)),
+        (_wrote, _wrote.set(False)), (_in_scope, _in_scope.set(True)),
+    ]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Sessions are read back right after being written, keep them on the primary
+        if model._meta.app_label == 'sessions':
+            return PRIMARY_DB
+        if _replica_reads.get() and not _pinned.get():
+            replicas = get_replica_aliases()
+            if replicas:
+                return random.choice(replicas)
+        return PRIMARY_DB
+
+    def db_for_write(self, model, **hints):
+        # Outside a request scope there is nothing to reset the pin afterwards
+        if _in_scope.get():
+            _pinned.set(True)
+            _wrote.set(True)
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replica_aliases():
+            return False
+        return None
+
+
+class ReadReplicaMixin:
+    """
+    Serves safe (read-only) requests of a DRF view from a read replica.
+    Falls back to the primary when no replica is configured or the client is pinned.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            with use_read_replica():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
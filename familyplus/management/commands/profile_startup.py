@@ -0,0 +1,109 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: load the WSGI app, optionally warm it up, then time two requests
+FIRST_RESPONSE_SCRIPT = r'''
+import io, json, sys, time
+path, host, warm = sys.argv[1], sys.argv[2], sys.argv[3] == '1'
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+loaded = time.perf_counter()
+if warm:
+    from familyplus.warmup import warm_up
+    warm_up()
+warmed = time.perf_counter()
+
+def request():
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': host,
+        'SERVER_PORT': '443', 'HTTP_HOST': host, 'HTTPS': 'on', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.url_scheme': 'https', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.version': (1, 0), 'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+    status = []
+    started = time.perf_counter()
+    b''.join(application(environ, lambda s, headers, exc_info=None: status.append(s)))
+    return time.perf_counter() - started, status[0]
+
+first, status = request()
+second, _ = request()
+print(json.dumps({'load': loaded - started, 'warm_up': warmed - loaded, 'first': first, 'second': second, 'status': status}))
+'''
+
+
+class Command(BaseCommand):
+    """
+    Django management command that profiles a cold start of this project.
+
+    1. Runs ``python -X importtime`` on the WSGI application load and lists the
+       modules with the highest self import time.
+    2. Benchmarks time-to-first-response in fresh interpreters, with and without
+       familyplus.warmup (what gunicorn.conf.py runs before forking workers),
+       and reports the median of --runs processes.
+    """
+    help = 'Reports per-module import time and time-to-first-response of a cold process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Number of modules to list (default: 25).')
+        parser.add_argument('--runs', type=int, default=3, help='Fresh processes per benchmark variant (default: 3).')
+        parser.add_argument('--path', default='/api/store/categories/', help='Path requested by the benchmark.')
+        parser.add_argument('--host', default=None, help='Host header (default: first ALLOWED_HOSTS entry or localhost).')
+
+    def _env(self):
+        return dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+
+    def handle(self, *args, **options):
+        self._import_times(options['top'])
+        host = options['host'] or next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+        for warm in (False, True):
+            self._first_response(options['path'], host, warm, options['runs'])
+
+    def _import_times(self, top):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             'from django.core.wsgi import get_wsgi_application; get_wsgi_application()'],
+            env=self._env(), capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Loading the application failed:\n{result.stderr[-2000:]}")
+
+        modules = []
+        for line in result.stderr.splitlines():
+            # "import time:      1234 |       5678 |   package.module"
+            if not line.startswith('import time:') or 'imported package' in line:
+                continue
+            own, cumulative, name = line[len('import time:'):].split('|', 2)
+            modules.append((int(own), int(cumulative), name.strip()))
+
+        total = sum(own for own, _, _ in modules)
+        self.stdout.write(f"Imported {len(modules)} modules in {total / 1000:.0f} ms (sum of self times).")
+        self.stdout.write(f"{'self ms':>9} {'cumul. ms':>10}  module")
+        for own, cumulative, name in sorted(modules, reverse=True)[:top]:
+            self.stdout.write(f"{own / 1000:9.1f} {cumulative / 1000:10.1f}  {name}")
+
+    def _first_response(self, path, host, warm, runs):
+        samples = []
+        for _ in range(runs):
+            result = subprocess.run(
+                [sys.executable, '-c', FIRST_RESPONSE_SCRIPT, path, host, '1' if warm else '0'],
+                env=self._env(), capture_output=True, text=True,
+            )
+            if result.returncode:
+                raise CommandError(f"Benchmark process failed:\n{result.stderr[-2000:]}")
+            samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+        def median_ms(key):
+            return statistics.median(sample[key] for sample in samples) * 1000
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Warmed' if warm else 'Cold'} GET {path} ({samples[0]['status']}), median of {runs}: "
+            f"app load {median_ms('load'):.0f} ms, warm-up {median_ms('warm_up'):.0f} ms, "
+            f"first response {median_ms('first'):.1f} ms, second response {median_ms('second'):.1f} ms."
+        ))
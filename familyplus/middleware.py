@@ -0,0 +1,46 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .db_router import routing_scope, pin_to_primary, has_written, get_replica_aliases
+
+
+def _client_key(request):
+    # JWT clients are identified by their token, anonymous React carts by X-Cart-Id
+    # and legacy pages by the session cookie
+    identity = (
+        request.META.get('HTTP_AUTHORIZATION')
+        or request.META.get('HTTP_X_CART_ID')
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    if not identity:
+        return None
+    return 'primary-pin:' + hashlib.sha256(identity.encode()).hexdigest()
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pins a client to the primary database for DATABASE_REPLICA_PIN_SECONDS after
+    any request that wrote to it (read-your-writes for cart and checkout).
+    The pin is kept in the cache, so that the next request sees it whichever
+    worker serves it; production settings refuse replicas without CACHE_URL.
+    A cookie would not do: the React app calls the API cross-origin without
+    credentials, so only its Authorization and X-Cart-Id headers come back.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replica_aliases():
+            return self.get_response(request)
+
+        key = _client_key(request)
+        with routing_scope():
+            if key and cache.get(key):
+                pin_to_primary()
+            response = self.get_response(request)
+            if key and has_written():
+                cache.set(key, True, settings.DATABASE_REPLICA_PIN_SECONDS)
+        return response
@@ -0,0 +1,64 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+
+class LargeTablePaginator(Paginator):
+    """
+    Admin paginator that avoids COUNT(*) over big, unfiltered tables.
+
+    On PostgreSQL the planner's row estimate (pg_class.reltuples) is used when
+    the changelist has no filters and the table is known to be large; filtered
+    lists, small tables and other databases fall back to an exact count. Pair
+    with ``show_full_result_count = False`` so the admin does not run a second
+    unfiltered count.
+    """
+    # Below this many (estimated) rows an exact count is cheap enough
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where and not query.distinct:
+            estimate = self._estimate(queryset)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                return estimate
+        return super().count
+
+    def _estimate(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        # reltuples is -1 until the table has been analyzed
+        if row is None or row[0] < 0:
+            return None
+        return int(row[0])
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    Project-wide default for list endpoints (REST_FRAMEWORK['DEFAULT_PAGINATION_CLASS']).
+
+    Clients may ask for ?page_size=N, which is capped at ``max_page_size``;
+    views with different needs subclass this and change the two sizes.
+    """
+    page_size = 24
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ProductPagination(StandardPagination):
+    # Product cards carry images and variations, keep pages grid-sized
+    page_size = 24
+    max_page_size = 96
+
+
+class CategoryPagination(StandardPagination):
+    # Small rows; menus usually want the whole list in one page
+    page_size = 50
+    max_page_size = 200
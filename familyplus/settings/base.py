@@ -1,5 +1,6 @@
 from pathlib import Path
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 import os
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent  # one level up (project root)
@@ -19,16 +20,21 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'corsheaders',
 
+    # Project-wide pieces: static files and management commands that belong to no app
+    'familyplus',
     'category',
     'accounts',
     'store',
     'carts',
     'orders',
+    'reports',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',  # Serves collected static files before any other middleware runs
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'familyplus.middleware.ReplicaPinningMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Critical: must be as high as possible, above CommonMiddleware
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -66,11 +72,75 @@ USE_TZ = True
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Read replicas: aliases listed in DATABASE_REPLICAS take read-only catalog and
+# order-history traffic; clients stay on the primary for a while after a write
+DATABASE_ROUTERS = ['familyplus.db_router.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_PIN_SECONDS = config('DATABASE_REPLICA_PIN_SECONDS', default=5, cast=int)
+
+# Cache shared by every worker and management command: CACHE_URL=redis://host:6379/0
+# (needs the redis package) or memcached://host:11211. Without it each process gets
+# its own LocMemCache, which is only correct while a single process serves the site.
+CACHE_URL = config('CACHE_URL', default='')
+SHARED_CACHE = bool(CACHE_URL)
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}}
+elif CACHE_URL.startswith('memcached://'):
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': CACHE_URL.removeprefix('memcached://'),
+    }}
+elif CACHE_URL:
+    raise ImproperlyConfigured("CACHE_URL must start with redis://, rediss:// or memcached://.")
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Sessions: SESSION_BACKEND picks 'cached_db' (reads served from the cache; the default
+# when CACHE_URL is set), 'db' (the default otherwise, since a per-process cache would
+# keep serving a session that another worker flushed) or 'signed_cookies'
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + config(
+    'SESSION_BACKEND', default='cached_db' if SHARED_CACHE else 'db'
+)
+
 # Session timeout
 SESSION_EXPIRE_SECONDS = 3600
 SESSION_EXPIRE_AFTER_LAST_ACTIVITY = True
+# Touch throttling: the last-activity timestamp (and so the session) is rewritten
+# at most once per this many seconds instead of on every request
+SESSION_EXPIRE_AFTER_LAST_ACTIVITY_GRACE_PERIOD = config('SESSION_ACTIVITY_RESOLUTION', default=60, cast=int)
 SESSION_TIMEOUT_REDIRECT = '/accounts/login/'
 
+# Flat shipping charge added to every cart (carts/pricing.py)
+CART_SHIPPING_CHARGE = config('CART_SHIPPING_CHARGE', default=40, cast=int)
+
+# Home page snapshot (store/snapshots.py): served stale after this many seconds
+# while a background thread rebuilds it
+HOME_SNAPSHOT_MAX_AGE = config('HOME_SNAPSHOT_MAX_AGE', default=300, cast=int)
+HOME_SNAPSHOT_BACKGROUND_REFRESH = True
+
+# Per-process cache of price/stock rows for /api/store/products/availability/ (store/availability.py)
+PRODUCT_AVAILABILITY_TTL = config('PRODUCT_AVAILABILITY_TTL', default=10, cast=int)
+
+# Unpaid checkouts: reused by a retried checkout of the same cart for this long,
+# then removed by the purge_pending_orders command
+PENDING_ORDER_TTL_HOURS = config('PENDING_ORDER_TTL_HOURS', default=72, cast=int)
+
+# Facet counts per filter combination (store/filters.py). Catalog writes invalidate them
+# earlier only through a shared cache (CACHE_URL); with per-process caches the TTL alone
+# bounds how stale other workers' counts get, so it defaults much shorter
+PRODUCT_FACETS_TTL = config('PRODUCT_FACETS_TTL', default=600 if SHARED_CACHE else 60, cast=int)
+
+# Product view / search counters (store/analytics.py) are buffered per process and
+# written after this many seconds or events, whichever comes first
+ANALYTICS_FLUSH_INTERVAL = config('ANALYTICS_FLUSH_INTERVAL', default=30, cast=int)
+ANALYTICS_FLUSH_EVENTS = config('ANALYTICS_FLUSH_EVENTS', default=500, cast=int)
+# Product.popularity counts the views of this many days (rollup_analytics)
+ANALYTICS_POPULARITY_DAYS = config('ANALYTICS_POPULARITY_DAYS', default=30, cast=int)
+
+# In-process typeahead index (store/autocomplete.py): signals keep it current, and it is
+# rebuilt after this many seconds to pick up bulk updates that send no signals
+AUTOCOMPLETE_MAX_AGE = config('AUTOCOMPLETE_MAX_AGE', default=600, cast=int)
+
 # Email (common fields)
 EMAIL_HOST = config('EMAIL_HOST')
 EMAIL_PORT = config('EMAIL_PORT', cast=int)
@@ -87,6 +157,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    # Every list endpoint is paginated; ?page_size= is capped per view
+    'DEFAULT_PAGINATION_CLASS': 'familyplus.pagination.StandardPagination',
 }
 
 # SimpleJWT Settings
@@ -1,4 +1,5 @@
 from .base import *
+import dj_database_url
 
 DEBUG = True
 ALLOWED_HOSTS = ['*']
@@ -14,8 +15,12 @@ DATABASES = {
     }
 }
 
+# Optional read replicas, e.g. DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3
+for index, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]), start=1):
+    DATABASES[f'replica{index}'] = dict(dj_database_url.parse(url), TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica{index}')
+
 STATIC_URL = '/static/'
-STATICFILES_DIRS = [BASE_DIR / 'familyplus' / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
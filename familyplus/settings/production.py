@@ -1,12 +1,13 @@
 from .base import *
 import dj_database_url
 import os
-import sentry_sdk
-from sentry_sdk.integrations.django import DjangoIntegration
 
-# Initialize Sentry
-SENTRY_DSN = config('SENTRY_DSN', default=None)
+# Initialize Sentry; the SDK is only imported when a DSN is configured, which keeps it out of cold starts otherwise
+SENTRY_DSN = config('SENTRY_DSN', default='')
 if SENTRY_DSN:
+    import sentry_sdk
+    from sentry_sdk.integrations.django import DjangoIntegration
+
     sentry_sdk.init(
         dsn=SENTRY_DSN,
         integrations=[DjangoIntegration()],
@@ -40,11 +41,30 @@ if not DATABASES['default']:
         'CONN_MAX_AGE': 600,
     }
 
+# Read replicas pulled from DATABASE_REPLICA_URLS (comma-separated database URLs)
+for index, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]), start=1):
+    DATABASES[f'replica{index}'] = dict(
+        dj_database_url.parse(url, conn_max_age=600, ssl_require=True),
+        TEST={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(f'replica{index}')
+if DATABASE_REPLICAS and not SHARED_CACHE:
+    # Read-your-writes pins (familyplus.middleware) must be seen by every worker
+    raise ImproperlyConfigured("DATABASE_REPLICA_URLS needs a shared cache; set CACHE_URL.")
+
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# collectstatic writes hashed file names plus .gz and .br (brotli) variants; WhiteNoise serves
+# hashed files as immutable for ten years and everything else for WHITENOISE_MAX_AGE seconds
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+WHITENOISE_MAX_AGE = config('STATIC_MAX_AGE', default=3600, cast=int)
+
 # Security & HTTPS
 SECURE_SSL_REDIRECT = config('SECURE_SSL_REDIRECT', default=True, cast=bool)
 SESSION_COOKIE_SECURE = True
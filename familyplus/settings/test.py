@@ -0,0 +1,5 @@
+from .development import *
+
+# A second alias mirroring the test database, so the replica routing tests always
+# run; they route to it by listing it in DATABASE_REPLICAS with override_settings
+DATABASES.setdefault('replica1', dict(DATABASES['default'], TEST={'MIRROR': 'default'}))
@@ -0,0 +1,68 @@
+import shutil
+import tempfile
+
+from unittest import mock
+
+from django.core.management import call_command
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.urls import clear_url_caches, get_resolver
+
+from store.serializers import ProductSerializer
+from .warmup import WARM_TEMPLATES, warm_up
+
+
+class StaticFilesTests(SimpleTestCase):
+    """collectstatic with the production storage, served through WhiteNoise."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, static_root)
+        overrides = override_settings(
+            STATIC_ROOT=static_root,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+            },
+            WHITENOISE_MAX_AGE=3600,
+        )
+        overrides.enable()
+        cls.addClassCleanup(overrides.disable)
+        # Only the project's own files; compressing the admin's assets makes the test slow
+        call_command('collectstatic', interactive=False, verbosity=0, ignore_patterns=['admin', 'rest_framework'])
+
+    def test_hashed_files_are_immutable_and_precompressed(self):
+        url = staticfiles_storage.url('css/style.css')
+        self.assertRegex(url, r'^/static/css/style\.[0-9a-f]{12}\.css$')
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response['Cache-Control'], 'max-age=315360000, public, immutable')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_unhashed_files_use_the_configured_max_age(self):
+        response = self.client.get('/static/css/style.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'max-age=3600, public')
+
+
+class WarmUpTests(SimpleTestCase):
+    def test_warm_up_prepares_urls_templates_and_serializers_without_the_database(self):
+        clear_url_caches()
+        template_loader = engines['django'].engine.template_loaders[0]
+        template_loader.reset()
+        # SimpleTestCase fails any database query
+        with mock.patch.object(ProductSerializer, 'get_fields', autospec=True, side_effect=ProductSerializer.get_fields) as get_fields:
+            report = warm_up()
+
+        self.assertEqual(set(report), {'urls', 'drf_settings', 'serializers', 'templates'})
+        self.assertTrue(get_resolver()._populated)
+        self.assertLessEqual(set(WARM_TEMPLATES), set(template_loader.get_template_cache))
+        get_fields.assert_called_once()
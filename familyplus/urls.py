@@ -16,6 +16,7 @@ urlpatterns = [
     path('api/store/', include('store.api_urls')),
     path('api/cart/', include('carts.api_urls')),
     path('api/orders/', include('orders.api_urls')),
+    path('api/reports/', include('reports.api_urls')),
 ]
 
 # Serve media files
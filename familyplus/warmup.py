@@ -0,0 +1,100 @@
+"""
+Process warm-up run before a server accepts traffic.
+
+Gunicorn calls warm_up() in the master after the application has been
+preloaded (gunicorn.conf.py), so the work below is done once and shared with
+every forked worker instead of being paid by each worker's first requests:
+URL resolution, DRF settings imports, serializer field construction (which
+fills the model _meta caches) and template compilation in the cached loader.
+It never touches the database.
+"""
+import logging
+import time
+
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.serializers import BaseSerializer, ListSerializer
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+WARM_TEMPLATES = (
+    'admin/login.html',
+    'admin/index.html',
+    'admin/change_list.html',
+    'admin/change_form.html',
+    'rest_framework/api.html',
+)
+
+DRF_SETTINGS = (
+    'DEFAULT_RENDERER_CLASSES',
+    'DEFAULT_PARSER_CLASSES',
+    'DEFAULT_AUTHENTICATION_CLASSES',
+    'DEFAULT_PERMISSION_CLASSES',
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS',
+    'DEFAULT_PAGINATION_CLASS',
+)
+
+
+def _view_classes(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _view_classes(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            # DRF views expose .cls, plain Django class-based views .view_class
+            view_class = getattr(pattern.callback, 'cls', None) or getattr(pattern.callback, 'view_class', None)
+            if view_class is not None:
+                yield view_class
+
+
+def _build_fields(serializer, seen):
+    if isinstance(serializer, ListSerializer):
+        serializer = serializer.child
+    if type(serializer) in seen:
+        return
+    seen.add(type(serializer))
+    for field in serializer.fields.values():
+        if isinstance(field, BaseSerializer):
+            _build_fields(field, seen)
+
+
+def warm_up():
+    """Returns a {step: seconds} timing report."""
+    report = {}
+
+    started = time.perf_counter()
+    resolver = get_resolver()
+    view_classes = set(_view_classes(resolver.url_patterns))
+    # Builds the reverse lookup tables
+    resolver.reverse_dict
+    report['urls'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for name in DRF_SETTINGS:
+        getattr(api_settings, name)
+    report['drf_settings'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    seen = set()
+    for view_class in view_classes:
+        serializer_class = getattr(view_class, 'serializer_class', None)
+        if serializer_class is not None:
+            try:
+                _build_fields(serializer_class(), seen)
+            except Exception:
+                logger.warning("Could not warm up %s", serializer_class.__name__, exc_info=True)
+    report['serializers'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for template_name in WARM_TEMPLATES:
+        try:
+            get_template(template_name)
+        except TemplateDoesNotExist:
+            pass
+    report['templates'] = time.perf_counter() - started
+
+    # Workers must not inherit open database sockets from the master
+    connections.close_all()
+    return report
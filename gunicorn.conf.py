@@ -0,0 +1,36 @@
+"""
+Gunicorn settings for the container (see Dockerfile).
+
+The application is loaded once in the master (preload_app) and warmed up in
+when_ready, with the autocomplete index built, before any worker is forked.
+gc.freeze() then moves everything allocated so far into the permanent
+generation, so the garbage collector in the workers never writes to those
+objects and the copy-on-write pages stay shared between workers.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+threads = int(os.environ.get('GUNICORN_THREADS', '1'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+preload_app = True
+accesslog = '-'
+
+
+def when_ready(server):
+    from familyplus.warmup import warm_up
+    from store.autocomplete import build_index
+
+    # The typeahead index is then shared by the workers too; warm_up() closes
+    # the database connection it used. Workers build it lazily if this fails.
+    try:
+        build_index()
+    except Exception:
+        server.log.exception("Could not build the autocomplete index before forking")
+    report = warm_up()
+    gc.freeze()
+    server.log.info(
+        "Warm-up done before forking workers: %s",
+        ', '.join(f"{step} {seconds * 1000:.0f} ms" for step, seconds in report.items()),
+    )
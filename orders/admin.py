@@ -1,12 +1,20 @@
 from django.contrib import admin
+from familyplus.exports import make_export_actions
+from familyplus.pagination import LargeTablePaginator
 from .models import Payment, Order, OrderProduct
+from .exports import export_orders, export_order_lines
 
 
 class OrderProductInline(admin.TabularInline):
     model = OrderProduct
-    readonly_fields = ('payment', 'user', 'product', 'quantity', 'product_price', 'ordered')
+    # Variations are read-only too: an editable select would list every variation in the catalog per line
+    readonly_fields = ('payment', 'user', 'product', 'variation', 'quantity', 'product_price', 'ordered')
     extra = 0
 
+    def get_queryset(self, request):
+        # Every read-only relation is rendered by name for each line
+        return super().get_queryset(request).select_related('payment', 'user', 'product').prefetch_related('variation')
+
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
@@ -18,7 +26,11 @@ class OrderAdmin(admin.ModelAdmin):
     list_filter = ('status', 'is_ordered', 'created_at')
     search_fields = ('order_number', 'first_name', 'last_name', 'phone', 'email')
     list_per_page = 20
+    autocomplete_fields = ('user', 'payment')
+    paginator = LargeTablePaginator
+    show_full_result_count = False
     inlines = [OrderProductInline]
+    actions = make_export_actions(export_orders)
 
     def has_delete_permission(self, request, obj=None):
         # Prevent accidental deletion of order records
@@ -34,6 +46,10 @@ class PaymentAdmin(admin.ModelAdmin):
     list_display = ('payment_id', 'user', 'payment_method', 'amount_paid', 'status', 'created_at')
     search_fields = ('payment_id', 'user__email', 'status')
     list_filter = ('payment_method', 'status', 'created_at')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
+    paginator = LargeTablePaginator
+    show_full_result_count = False
 
 
 @admin.register(OrderProduct)
@@ -41,3 +57,8 @@ class OrderProductAdmin(admin.ModelAdmin):
     list_display = ('order', 'product', 'user', 'quantity', 'product_price', 'ordered', 'created_at')
     search_fields = ('order__order_number', 'product__product_name', 'user__email')
     list_filter = ('ordered', 'created_at')
+    list_select_related = ('order', 'product', 'user')
+    autocomplete_fields = ('order', 'payment', 'user', 'product', 'variation')
+    paginator = LargeTablePaginator
+    show_full_result_count = False
+    actions = make_export_actions(export_order_lines)
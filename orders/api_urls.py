@@ -1,12 +1,15 @@
 from django.urls import path
 from .api_views import (
     CheckoutAPIView, PaymentProcessAPIView, 
-    OrderHistoryAPIView, OrderDetailAPIView
+    OrderHistoryAPIView, OrderDetailAPIView,
+    OrderExportAPIView, OrderLineExportAPIView
 )
 
 urlpatterns = [
     path('checkout/', CheckoutAPIView.as_view(), name='api-checkout'),
     path('process-payment/', PaymentProcessAPIView.as_view(), name='api-process-payment'),
     path('history/', OrderHistoryAPIView.as_view(), name='api-order-history'),
+    path('export/', OrderExportAPIView.as_view(), name='api-order-export'),
+    path('export/lines/', OrderLineExportAPIView.as_view(), name='api-order-line-export'),
     path('<str:order_number>/', OrderDetailAPIView.as_view(), name='api-order-detail'),
 ]
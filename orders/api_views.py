@@ -1,54 +1,69 @@
 import datetime
 from rest_framework import generics, status, views
 from rest_framework.response import Response
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
 from django.db import transaction
-from django.db.models import F
+from django.db.models import Count, Prefetch
 from django.shortcuts import get_object_or_404
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
+from django.utils import timezone
 
 from .models import Order, Payment, OrderProduct
 from carts.models import CartItem
-from .serializers import OrderSerializer, OrderDetailSerializer
+from store.models import Variation
+from carts.pricing import cart_fingerprint, price_cart
+from familyplus.db_router import ReadReplicaMixin
+from familyplus.exports import StreamingExportAPIView
+from .serializers import OrderSerializer, OrderSummarySerializer, OrderDetailSerializer
+from .utils import create_order_products
+from .exports import export_orders, export_order_lines
 
 class CheckoutAPIView(views.APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
         current_user = request.user
-        cart_items = CartItem.objects.filter(user=current_user, is_active=True)
-        
-        if not cart_items.exists():
+        # One query prices every line; the snapshot is kept for the payment step
+        priced_cart = price_cart(CartItem.objects.filter(user=current_user, is_active=True))
+
+        if not priced_cart['lines']:
             return Response({"error": "Your cart is empty."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Calculate totals
-        total = sum((item.product.price * item.quantity) for item in cart_items)
-        shipping = 40  # Hardcoded exactly as in original views.py
-        grand_total = total + shipping
+        grand_total = priced_cart['grand_total']
+        fingerprint = cart_fingerprint(priced_cart)
 
-        serializer = OrderSerializer(data=request.data)
-        if serializer.is_valid():
-            # Save the Order with calculated totals and user IP
-            order = serializer.save(
-                user=current_user,
-                order_total=grand_total,
-                shipping=shipping,
-                ip=request.META.get('REMOTE_ADDR'),
-                is_ordered=False
-            )
+        # A retry (or a step back) with the same cart reuses the latest unpaid order instead of adding one
+        pending = Order.objects.filter(
+            user=current_user, is_ordered=False,
+            updated_at__gte=timezone.now() - datetime.timedelta(hours=settings.PENDING_ORDER_TTL_HOURS),
+        ).order_by('-updated_at').first()
+        reuse = pending is not None and pending.cart_fingerprint == fingerprint
 
-            # Generate unique order number (YYYYMMDD + order.id)
-            current_date = datetime.date.today().strftime('%Y%m%d')
-            order_number = f"{current_date}{order.id}"
-            order.order_number = order_number
-            order.save()
+        serializer = OrderSerializer(pending if reuse else None, data=request.data)
+        if serializer.is_valid():
+            if reuse:
+                # Only the address and note can have changed
+                order = serializer.save()
+            else:
+                # Save the Order with calculated totals and user IP; order_number comes from the field default
+                order = serializer.save(
+                    user=current_user,
+                    order_total=grand_total,
+                    shipping=priced_cart['shipping'],
+                    ip=request.META.get('REMOTE_ADDR'),
+                    is_ordered=False,
+                    cart_snapshot=priced_cart,
+                    cart_fingerprint=fingerprint,
+                )
 
             return Response({
                 "message": "Order created successfully. Proceed to payment.",
                 "order_number": order.order_number,
                 "grand_total": grand_total
-            }, status=status.HTTP_201_CREATED)
+            }, status=status.HTTP_200_OK if reuse else status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -69,6 +84,12 @@ class PaymentProcessAPIView(views.APIView):
             except Order.DoesNotExist:
                 return Response({"error": "Order does not exist or is already processed."}, status=status.HTTP_404_NOT_FOUND)
 
+            # Reuse the cart priced at checkout; orders created before snapshots existed re-price the cart
+            priced_cart = order.cart_snapshot or price_cart(CartItem.objects.filter(user=request.user, is_active=True))
+            if not priced_cart['lines']:
+                # Should not happen ideally if checkout passed, but safe to check
+                return Response({"error": "Cart is empty."}, status=status.HTTP_400_BAD_REQUEST)
+
             # Create the Payment object (hardcoded to Cash On Delivery as per old logic)
             payment = Payment.objects.create(
                 user=request.user,
@@ -82,32 +103,8 @@ class PaymentProcessAPIView(views.APIView):
             order.is_ordered = True
             order.save()
 
-            cart_items = CartItem.objects.filter(user=request.user, is_active=True)
-            if not cart_items.exists():
-                # Should not happen ideally if checkout passed, but safe to check
-                return Response({"error": "Cart is empty."}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Move cart items to OrderProduct and reduce stock securely
-            for item in cart_items:
-                order_product = OrderProduct.objects.create(
-                    order=order,
-                    payment=payment,
-                    user=request.user,
-                    product=item.product,
-                    quantity=item.quantity,
-                    product_price=item.product.price,
-                    ordered=True,
-                )
-
-                # Transfer variations
-                order_product.variation.set(item.variations.all())
-
-                # Safely reduce stock using F() expressions to prevent concurrency race conditions
-                item.product.stock = F('stock') - item.quantity
-                item.product.save(update_fields=['stock'])
-
-            # Clear user's cart
-            cart_items.delete()
+            # Move the priced lines to OrderProduct, reduce stock with F() and clear the cart
+            create_order_products(order, payment, request.user, priced_cart)
 
             # Send order confirmation email pointing to the future React application
             mail_subject = 'Thank you for your order'
@@ -123,12 +120,22 @@ class PaymentProcessAPIView(views.APIView):
                 "order_number": order.order_number
             }, status=status.HTTP_200_OK)
 
-class OrderHistoryAPIView(generics.ListAPIView):
+class OrderHistoryPagination(CursorPagination):
+    # Keyset pagination: the cost of a page does not grow with how far back it is
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+class OrderHistoryAPIView(ReadReplicaMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated]
-    serializer_class = OrderSerializer
+    serializer_class = OrderSummarySerializer
+    pagination_class = OrderHistoryPagination
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user, is_ordered=True).order_by('-created_at')
+        return Order.objects.filter(user=self.request.user, is_ordered=True).only(
+            'id', 'order_number', 'order_total', 'shipping', 'status', 'created_at'
+        ).annotate(item_count=Count('orderproduct'))
 
 class OrderDetailAPIView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
@@ -136,11 +143,43 @@ class OrderDetailAPIView(generics.RetrieveAPIView):
     lookup_field = 'order_number'
 
     def get_queryset(self):
+        # Order with payment, then lines with their product, then variations: three queries per order
+        lines = OrderProduct.objects.select_related('product').only(
+            'id', 'order_id', 'quantity', 'product_price', 'ordered', 'created_at',
+            'product__id', 'product__product_name', 'product__slug', 'product__images',
+        ).order_by('id')
         return Order.objects.filter(
             user=self.request.user, 
             is_ordered=True
-        ).prefetch_related(
-            'orderproduct_set',
-            'orderproduct_set__product',
-            'orderproduct_set__variation'
+        ).select_related('payment').prefetch_related(
+            Prefetch('orderproduct_set', queryset=lines),
+            Prefetch('orderproduct_set__variation', queryset=Variation.objects.only(
+                'id', 'variation_category', 'variation_value', 'is_active'
+            )),
         )
+
+def _filter_created(queryset, request, field='created_at'):
+    # Optional ?start=/?end= (YYYY-MM-DD, inclusive); invalid dates raise ValueError
+    start = request.query_params.get('start')
+    end = request.query_params.get('end')
+    if start:
+        queryset = queryset.filter(**{f'{field}__date__gte': datetime.date.fromisoformat(start)})
+    if end:
+        queryset = queryset.filter(**{f'{field}__date__lte': datetime.date.fromisoformat(end)})
+    return queryset
+
+class OrderExportAPIView(StreamingExportAPIView):
+    """Streams placed orders as CSV or JSON Lines (staff only)."""
+    queryset = Order.objects.filter(is_ordered=True)
+    export = staticmethod(export_orders)
+
+    def filter_queryset(self, queryset):
+        return _filter_created(queryset, self.request)
+
+class OrderLineExportAPIView(StreamingExportAPIView):
+    """Streams ordered lines with product, category and variations (staff only)."""
+    queryset = OrderProduct.objects.filter(ordered=True)
+    export = staticmethod(export_order_lines)
+
+    def filter_queryset(self, queryset):
+        return _filter_created(queryset, self.request)
@@ -0,0 +1,57 @@
+from familyplus.exports import CHUNK_SIZE, merge_labels, stream_export
+from .models import OrderProduct
+
+ORDER_COLUMNS = (
+    ('id', 'id'),
+    ('order_number', 'order_number'),
+    ('created_at', 'created_at'),
+    ('status', 'status'),
+    ('is_ordered', 'is_ordered'),
+    ('user_email', 'user__email'),
+    ('first_name', 'first_name'),
+    ('last_name', 'last_name'),
+    ('phone', 'phone'),
+    ('email', 'email'),
+    ('city', 'city'),
+    ('state', 'state'),
+    ('country', 'country'),
+    ('order_total', 'order_total'),
+    ('shipping', 'shipping'),
+    ('payment_id', 'payment__payment_id'),
+    ('payment_method', 'payment__payment_method'),
+)
+
+ORDER_LINE_COLUMNS = (
+    ('id', 'id'),
+    ('order_number', 'order__order_number'),
+    ('created_at', 'created_at'),
+    ('user_email', 'user__email'),
+    ('product_id', 'product_id'),
+    ('product_name', 'product__product_name'),
+    ('category', 'product__category__category_name'),
+    ('quantity', 'quantity'),
+    ('product_price', 'product_price'),
+    ('ordered', 'ordered'),
+)
+
+
+def export_orders(queryset, export_format='csv'):
+    rows = queryset.order_by('id').values_list(
+        *(lookup for _, lookup in ORDER_COLUMNS)
+    ).iterator(chunk_size=CHUNK_SIZE)
+    return stream_export([name for name, _ in ORDER_COLUMNS], rows, 'orders', export_format)
+
+
+def export_order_lines(queryset, export_format='csv'):
+    rows = queryset.order_by('id').values_list(
+        *(lookup for _, lookup in ORDER_LINE_COLUMNS)
+    ).iterator(chunk_size=CHUNK_SIZE)
+    # Variations come from the through table as a second stream in the same order
+    variations = OrderProduct.variation.through.objects.filter(
+        orderproduct_id__in=queryset.values('id')
+    ).order_by('orderproduct_id', 'variation_id').values_list(
+        'orderproduct_id', 'variation__variation_category', 'variation__variation_value'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    labels = ((line_id, f"{category}: {value}") for line_id, category, value in variations)
+    header = [name for name, _ in ORDER_LINE_COLUMNS] + ['variations']
+    return stream_export(header, merge_labels(rows, labels), 'order-lines', export_format)
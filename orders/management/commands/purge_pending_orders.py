@@ -0,0 +1,72 @@
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    """
+    Django management command that removes unpaid checkouts.
+
+    Pending orders (is_ordered=False) last updated more than --hours ago are
+    deleted in batches of --batch-size ids, each in its own short transaction,
+    so no lock is held for long and payments keep going while it runs. A
+    retried checkout that reuses an order updates it, so an order still on its
+    way to payment never expires. An order paid or reused between the id scan
+    and its batch is left alone (both are checked again in the DELETE). With
+    --archive the rows of each batch are appended to a JSON Lines file before
+    they are deleted.
+    """
+    help = 'Deletes (optionally archives) unpaid pending orders older than a TTL, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=settings.PENDING_ORDER_TTL_HOURS,
+                            help=f'Hours without an update after which a pending order expires (default: {settings.PENDING_ORDER_TTL_HOURS}).')
+        parser.add_argument('--batch-size', type=int, default=500, help='Orders per transaction (default: 500).')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches (default: 0).')
+        parser.add_argument('--archive', metavar='PATH', help='Append the deleted orders to this JSON Lines file.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired orders.')
+
+    def handle(self, *args, **options):
+        if options['hours'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--hours and --batch-size must be positive.")
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        expired = Order.objects.filter(is_ordered=False, updated_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} pending orders last updated before {cutoff:%Y-%m-%d %H:%M} would be purged.")
+            return
+
+        archive = open(options['archive'], 'a', encoding='utf-8') if options['archive'] else None
+        purged = 0
+        started = time.perf_counter()
+        try:
+            last_id = 0
+            while ids := list(expired.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:options['batch_size']]):
+                last_id = ids[-1]
+                with transaction.atomic():
+                    batch = expired.filter(id__in=ids)
+                    if archive is not None:
+                        for row in batch.values():
+                            archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                        archive.flush()
+                    _, deleted = batch.delete()
+                purged += deleted.get('orders.Order', 0)
+                if options['pause']:
+                    time.sleep(options['pause'])
+        finally:
+            if archive is not None:
+                archive.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Purged {purged} pending orders last updated before {cutoff:%Y-%m-%d %H:%M} "
+            f"in {time.perf_counter() - started:.1f}s"
+            + (f", archived to {options['archive']}." if archive is not None else ".")
+        ))
@@ -0,0 +1,42 @@
+import secrets
+
+from django.db import migrations
+from django.utils import timezone
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+
+def backfill_order_numbers(apps, schema_editor):
+    """
+    Gives every order a unique number before the unique index is added. Existing
+    numbers (YYYYMMDD + id) are kept; blank ones (the second save never
+    happened) and later duplicates get YYYYMMDD of their creation date plus a
+    random suffix, like orders.models.generate_order_number.
+    """
+    Order = apps.get_model('orders', 'Order')
+    seen = set()
+    to_update = []
+    for order in Order.objects.order_by('id').only('id', 'order_number', 'created_at').iterator(chunk_size=2000):
+        if order.order_number and order.order_number not in seen:
+            seen.add(order.order_number)
+            continue
+        while True:
+            suffix = ''.join(secrets.choice(ALPHABET) for _ in range(10))
+            number = f"{timezone.localtime(order.created_at):%Y%m%d}{suffix}"
+            if number not in seen:
+                break
+        seen.add(number)
+        order.order_number = number
+        to_update.append(order)
+    Order.objects.bulk_update(to_update, ['order_number'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_order_cart_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_order_numbers, migrations.RunPython.noop),
+    ]
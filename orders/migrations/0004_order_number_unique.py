@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:20
+
+import orders.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_backfill_order_numbers'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='order_number',
+            field=models.CharField(default=orders.models.generate_order_number, max_length=20, unique=True),
+        ),
+    ]
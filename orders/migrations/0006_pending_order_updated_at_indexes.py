@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_pending_order_reuse'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_pending_user_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_pending_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('is_ordered', False)), fields=['user', '-updated_at'], name='order_pending_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('is_ordered', False)), fields=['updated_at'], name='order_pending_updated_idx'),
+        ),
+    ]
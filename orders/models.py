@@ -1,9 +1,27 @@
+import secrets
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from accounts.models import Account
 from store.models import Product, Variation
 
 # Create your models here.
 
+# Crockford base32: no I, L, O or U, so numbers read back over the phone unambiguously
+ORDER_NUMBER_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+
+def generate_order_number():
+    """
+    YYYYMMDD followed by 10 random base32 characters (50 bits), e.g.
+    20240105K3M9QZ7T2D. Assigned before the insert, so an order is written
+    once; the unique index rejects the (astronomically unlikely) collision.
+    """
+    suffix = ''.join(secrets.choice(ORDER_NUMBER_ALPHABET) for _ in range(10))
+    return f"{timezone.localdate():%Y%m%d}{suffix}"
+
 class Payment(models.Model):
     user = models.ForeignKey(Account, on_delete=models.CASCADE)
     payment_id = models.CharField(max_length=100)
@@ -25,7 +43,7 @@ class Order(models.Model):
 
     user = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True)
     payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, blank=True, null=True)
-    order_number = models.CharField(max_length=20)
+    order_number = models.CharField(max_length=20, unique=True, default=generate_order_number)
     first_name = models.CharField(max_length=50)
     last_name = models.CharField(max_length=50)
     phone = models.CharField(max_length=15)
@@ -41,9 +59,22 @@ class Order(models.Model):
     status = models.CharField(max_length=10, choices=STATUS, default='New')
     ip = models.CharField(blank=True, max_length=20)
     is_ordered = models.BooleanField(default=False)
+    # Priced cart captured at checkout (carts.pricing.price_cart), reused by the payment step
+    cart_snapshot = models.JSONField(null=True, blank=True, editable=False, encoder=DjangoJSONEncoder)
+    # carts.pricing.cart_fingerprint of the snapshot; a retried checkout of the same cart reuses the order
+    cart_fingerprint = models.CharField(max_length=64, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Pending (unpaid) orders are a small, short-lived part of the table: checkout looks up
+        # the user's latest one and purge_pending_orders scans the expired ones. Both go by
+        # updated_at, which a reusing checkout touches, so an order in use never expires
+        indexes = [
+            models.Index(fields=['user', '-updated_at'], condition=Q(is_ordered=False), name='order_pending_user_idx'),
+            models.Index(fields=['updated_at'], condition=Q(is_ordered=False), name='order_pending_updated_idx'),
+        ]
+
     def full_name(self):
         return f'{self.first_name} {self.last_name}'
     
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import Order, Payment, OrderProduct
-from carts.serializers import BasicProductSerializer
+from store.models import Product
 from store.serializers import VariationSerializer
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -19,8 +19,22 @@ class PaymentSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['user', 'payment_id', 'payment_method', 'amount_paid', 'status', 'created_at']
 
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """Order history row; item_count is annotated by the view."""
+    item_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['order_number', 'order_total', 'shipping', 'status', 'item_count', 'created_at']
+
+class OrderLineProductSerializer(serializers.ModelSerializer):
+    # The price of a line is OrderProduct.product_price, not the product's current price
+    class Meta:
+        model = Product
+        fields = ['id', 'product_name', 'slug', 'images']
+
 class OrderProductSerializer(serializers.ModelSerializer):
-    product = BasicProductSerializer(read_only=True)
+    product = OrderLineProductSerializer(read_only=True)
     variation = VariationSerializer(many=True, read_only=True)
 
     class Meta:
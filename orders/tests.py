@@ -1,3 +1,231 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import Account
+from carts.models import Cart, CartItem
+from category.models import Category
+from store.models import Product, Variation
+from .models import Order, OrderProduct
+
+ADDRESS = {
+    'first_name': 'Asha', 'last_name': 'Nair', 'phone': '9999999999', 'email': 'asha@example.com',
+    'address_line_1': '1 Main St', 'country': 'IN', 'state': 'KL', 'city': 'Kochi',
+}
+
+
+class CheckoutTestMixin:
+    def setUp(self):
+        self.user = Account.objects.create_user('Asha', 'Nair', 'asha', 'asha@example.com', 'secret-pass-123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(category_name='Toys', slug='toys')
+        self.products = [
+            Product.objects.create(product_name=f'Toy {n}', slug=f'toy-{n}', price=10 * n, stock=20, category=category)
+            for n in range(1, 6)
+        ]
+        for product in self.products:
+            item = CartItem.objects.create(user=self.user, product=product, quantity=2)
+            item.variations.add(Variation.objects.create(product=product, variation_category='color', variation_value='red'))
+
+    def _checkout(self):
+        return self.client.post('/api/orders/checkout/', ADDRESS, format='json')
+
+
+class CheckoutPricingTests(CheckoutTestMixin, TestCase):
+    def test_checkout_query_count_does_not_grow_with_cart_lines(self):
+        # cart lines, their variations, the latest pending order and the order insert
+        with self.assertNumQueries(4):
+            response = self._checkout()
+        self.assertEqual(response.status_code, 201)
+        # 2 x (10 + 20 + 30 + 40 + 50) + 40 shipping
+        self.assertEqual(response.json()['grand_total'], 340.0)
+        self.assertRegex(response.json()['order_number'], r'^\d{8}[0-9A-HJKMNP-TV-Z]{10}$')
+
+    def test_payment_reuses_priced_snapshot(self):
+        order_number = self._checkout().json()['order_number']
+        # A later price change must not alter what the customer checked out with
+        Product.objects.filter(pk=self.products[0].pk).update(price=999)
+
+        with mock.patch('orders.api_views.render_to_string', return_value=''):
+            response = self.client.post('/api/orders/process-payment/', {'order_number': order_number}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        order = Order.objects.get(order_number=order_number)
+        self.assertTrue(order.is_ordered)
+        lines = OrderProduct.objects.filter(order=order).order_by('product_id')
+        self.assertEqual([line.product_price for line in lines], [10, 20, 30, 40, 50])
+        self.assertEqual(lines[0].variation.count(), 1)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 18)
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
+
+
+class OrderExportTests(CheckoutTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        order_number = self._checkout().json()['order_number']
+        with mock.patch('orders.api_views.render_to_string', return_value=''):
+            self.client.post('/api/orders/process-payment/', {'order_number': order_number}, format='json')
+        self.order_number = order_number
+
+    def test_exports_are_staff_only(self):
+        self.assertEqual(self.client.get('/api/orders/export/').status_code, 403)
+
+    def test_line_export_streams_joined_rows_in_constant_queries(self):
+        self.user.is_staff = True
+        self.user.save()
+        # One query for the lines and one for their variations, however many lines there are
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/orders/export/lines/')
+            body = b''.join(response.streaming_content).decode()
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="order-lines-', response['Content-Disposition'])
+        header, first = body.splitlines()[:2]
+        self.assertTrue(header.startswith('id,order_number,created_at,user_email,product_id,product_name,category'))
+        self.assertIn(f',{self.order_number},', first)
+        self.assertIn('asha@example.com', first)
+        self.assertTrue(first.endswith(',color: red'))
+
+        response = self.client.get('/api/orders/export/?output=jsonl')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(row['order_number'], row['user_email'], row['payment_method']) for row in rows],
+                         [(self.order_number, 'asha@example.com', 'Cash On Delivery')])
+
+
+
+class AdminQueryCountTests(CheckoutTestMixin, TestCase):
+    def _place_order(self, products):
+        CartItem.objects.filter(user=self.user).delete()
+        for product in products:
+            item = CartItem.objects.create(user=self.user, product=product, quantity=1)
+            item.variations.set(product.variation_set.all())
+        self.client.force_authenticate(self.user)
+        order_number = self._checkout().json()['order_number']
+        with mock.patch('orders.api_views.render_to_string', return_value=''):
+            self.client.post('/api/orders/process-payment/', {'order_number': order_number}, format='json')
+        return Order.objects.get(order_number=order_number)
+
+    def _count_queries(self, url):
+        # Warm up the session and the admin's per-process caches first
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_admin_pages_do_not_query_per_row(self):
+        small = self._place_order(self.products[:1])
+        large = self._place_order(self.products)
+        admin_user = Account.objects.create_superuser('Root', 'Admin', 'root@example.com', 'root', 'secret-pass-123')
+        self.client.force_login(admin_user)
+
+        # Order lines render their product, user and payment by name in the inline
+        self.assertEqual(
+            self._count_queries(f'/admin/orders/order/{large.pk}/change/'),
+            self._count_queries(f'/admin/orders/order/{small.pk}/change/'),
+        )
+        # Anonymous cart items have a nullable cart and user, which plain select_related() skips
+        cart = Cart.objects.create(cart_id='anonymous')
+        CartItem.objects.create(cart=cart, product=self.products[0], quantity=1)
+        baseline = self._count_queries('/admin/carts/cartitem/')
+        for product in self.products[1:]:
+            CartItem.objects.create(cart=Cart.objects.create(cart_id=product.slug), product=product, quantity=1)
+        self.assertEqual(self._count_queries('/admin/carts/cartitem/'), baseline)
+
+
+class OrderHistoryTests(CheckoutTestMixin, TestCase):
+    def _place_order(self, products):
+        CartItem.objects.filter(user=self.user).delete()
+        for product in products:
+            item = CartItem.objects.create(user=self.user, product=product, quantity=1)
+            item.variations.set(product.variation_set.all())
+        order_number = self._checkout().json()['order_number']
+        with mock.patch('orders.api_views.render_to_string', return_value=''):
+            self.client.post('/api/orders/process-payment/', {'order_number': order_number}, format='json')
+        return order_number
+
+    def test_history_is_cursor_paginated_with_item_counts(self):
+        numbers = [self._place_order(self.products[:n]) for n in range(1, 6)]
+        with self.assertNumQueries(1):
+            page = self.client.get('/api/orders/history/?page_size=3').json()
+        self.assertEqual([row['order_number'] for row in page['results']], numbers[:1:-1])
+        self.assertEqual([row['item_count'] for row in page['results']], [5, 4, 3])
+        self.assertNotIn('first_name', page['results'][0])
+
+        page = self.client.get(page['next']).json()
+        self.assertEqual([row['order_number'] for row in page['results']], numbers[1::-1])
+        self.assertIsNone(page['next'])
+
+    def test_detail_query_count_does_not_grow_with_lines(self):
+        small = self._place_order(self.products[:1])
+        large = self._place_order(self.products)
+        # order with payment, lines with products, variations
+        with self.assertNumQueries(3):
+            self.client.get(f'/api/orders/{small}/')
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/orders/{large}/')
+        data = response.json()
+        self.assertEqual(data['payment']['payment_method'], 'Cash On Delivery')
+        self.assertEqual(len(data['order_products']), 5)
+        self.assertEqual(set(data['order_products'][0]['product']), {'id', 'product_name', 'slug', 'images'})
+        self.assertEqual(data['order_products'][0]['variation'][0]['variation_value'], 'red')
+
+
+class PendingOrderTests(CheckoutTestMixin, TestCase):
+    def test_retried_checkout_of_the_same_cart_reuses_the_order(self):
+        first = self._checkout()
+        self.assertEqual(first.status_code, 201)
+        retry = self.client.post('/api/orders/checkout/', dict(ADDRESS, city='Kollam'), format='json')
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json()['order_number'], first.json()['order_number'])
+        self.assertEqual(list(Order.objects.values_list('city', flat=True)), ['Kollam'])
+
+        CartItem.objects.filter(user=self.user, product=self.products[0]).update(quantity=3)
+        changed = self._checkout()
+        self.assertEqual(changed.status_code, 201)
+        self.assertNotEqual(changed.json()['order_number'], first.json()['order_number'])
+
+    def test_expired_pending_orders_are_not_reused(self):
+        self._checkout()
+        Order.objects.update(updated_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(self._checkout().status_code, 201)
+
+    def test_reused_order_is_not_purged_however_old(self):
+        order_number = self._checkout().json()['order_number']
+        Order.objects.update(created_at=timezone.now() - timedelta(days=30), updated_at=timezone.now() - timedelta(hours=71))
+        self.assertEqual(self._checkout().status_code, 200)
+        call_command('purge_pending_orders', stdout=StringIO())
+        self.assertEqual(list(Order.objects.values_list('order_number', flat=True)), [order_number])
+
+    def test_purge_deletes_and_archives_expired_pending_orders_only(self):
+        for _ in range(3):
+            self._checkout()
+            CartItem.objects.filter(user=self.user, product=self.products[0]).update(quantity=10 + Order.objects.count())
+        paid = Order.objects.order_by('id').first()
+        Order.objects.filter(pk=paid.pk).update(is_ordered=True)
+        Order.objects.update(updated_at=timezone.now() - timedelta(days=10))
+        fresh = self._checkout().json()['order_number']
+        self.assertEqual(Order.objects.count(), 4)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        archive = os.path.join(directory.name, 'pending.jsonl')
+        call_command('purge_pending_orders', batch_size=1, archive=archive, stdout=StringIO())
 
-# Create your tests here.
+        self.assertEqual(
+            set(Order.objects.values_list('order_number', flat=True)), {paid.order_number, fresh}
+        )
+        with open(archive) as lines:
+            archived = [json.loads(line) for line in lines]
+        self.assertEqual(len(archived), 2)
+        self.assertTrue(all(not row['is_ordered'] for row in archived))
@@ -0,0 +1,53 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, When, F
+
+from carts.models import CartItem
+from store.availability import invalidate_availability
+from store.models import Product
+from .models import OrderProduct
+
+
+def create_order_products(order, payment, user, priced_cart):
+    """
+    Turns a priced-cart snapshot into OrderProduct rows, moves stock and clears
+    the purchased cart lines with a fixed number of queries, however many lines
+    the order has.
+    """
+    lines = priced_cart['lines']
+    order_products = OrderProduct.objects.bulk_create([
+        OrderProduct(
+            order=order,
+            payment=payment,
+            user=user,
+            product_id=line['product_id'],
+            quantity=line['quantity'],
+            product_price=Decimal(line['unit_price']),
+            ordered=True,
+        )
+        for line in lines
+    ])
+
+    # Transfer variations
+    through = OrderProduct.variation.through
+    through.objects.bulk_create([
+        through(orderproduct_id=order_product.id, variation_id=variation_id)
+        for order_product, line in zip(order_products, lines)
+        for variation_id in line['variation_ids']
+    ])
+
+    # Reduce stock for every product in one UPDATE using F() expressions
+    quantities = Counter()
+    for line in lines:
+        quantities[line['product_id']] += line['quantity']
+    Product.objects.filter(pk__in=quantities).update(stock=Case(
+        *[When(pk=product_id, then=F('stock') - quantity) for product_id, quantity in quantities.items()],
+        default=F('stock'),
+    ))
+    # The bulk UPDATE sends no post_save signals
+    transaction.on_commit(lambda: invalidate_availability(list(quantities)))
+
+    CartItem.objects.filter(pk__in=[line['cart_item_id'] for line in lines]).delete()
+    return order_products
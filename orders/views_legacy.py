@@ -1,12 +1,12 @@
 from django.views.decorators.http import require_POST
 from django.shortcuts import render, redirect, get_object_or_404
 from django.db import transaction
-from django.db.models import F
 from carts.models import CartItem
+from carts.pricing import price_cart
 from store.models import Product
 from .models import Order, Payment, OrderProduct
 from .forms import OrderForm
-import datetime
+from .utils import create_order_products
 
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
@@ -43,34 +43,9 @@ def payments(request):
     order.is_ordered = True
     order.save()
 
-    # Move items from Cart to OrderProduct
-    cart_items = CartItem.objects.filter(user=request.user)
-    for item in cart_items:
-        order_product = OrderProduct.objects.create(
-            order=order,
-            payment=payment,
-            user=request.user,
-            product=item.product,
-            quantity=item.quantity,
-            product_price=item.product.price,
-            ordered=True,
-        )
-
-        # Transfer variations
-        order_product.variation.set(item.variations.all())
-
-        # Reduce product stock
-        item.product.stock = F('stock') - item.quantity
-        item.product.save(update_fields=['stock'])
-
-        # Refresh from DB if you need to check if it dropped below zero (optional but good practice)
-        item.product.refresh_from_db()
-        if item.product.stock < 0:
-            # Handle edge case where overselling happened
-            pass
-
-    # Clear user’s cart
-    cart_items.delete()
+    # Move the lines priced in place_order to OrderProduct, reduce stock and clear the cart
+    priced_cart = order.cart_snapshot or price_cart(CartItem.objects.filter(user=request.user))
+    create_order_products(order, payment, request.user, priced_cart)
 
     # Send confirmation email
     mail_subject = 'Thank you for your order'
@@ -91,15 +66,14 @@ def place_order(request, total=0, quantity=0):
     current_user = request.user
 
     cart_items = CartItem.objects.filter(user=current_user)
-    if not cart_items.exists():
+    # Price every line in one query; the snapshot is reused by payments()
+    priced_cart = price_cart(cart_items)
+    if not priced_cart['lines']:
         return redirect('store:store')
 
-    # Calculate totals
-    for item in cart_items:
-        total += (item.product.price * item.quantity)
-        quantity += item.quantity
-    shipping = 40
-    grand_total = total + shipping
+    total = priced_cart['total']
+    shipping = priced_cart['shipping']
+    grand_total = priced_cart['grand_total']
 
     if request.method == 'POST':
         form = OrderForm(request.POST)
@@ -119,18 +93,14 @@ def place_order(request, total=0, quantity=0):
                 order_total=grand_total,
                 shipping=shipping,
                 ip=request.META.get('REMOTE_ADDR'),
+                cart_snapshot=priced_cart,
             )
-            data.save()
-
-            # Generate unique order number
-            current_date = datetime.date.today().strftime('%Y%m%d')
-            order_number = f"{current_date}{data.id}"
-            data.order_number = order_number
+            # order_number is generated by the field default, so this is the only write
             data.save()
 
             context = {
                 'order': data,
-                'cart_items': cart_items,
+                'cart_items': cart_items.select_related('product').prefetch_related('variations'),
                 'total': total,
                 'shipping': shipping,
                 'grand_total': grand_total,
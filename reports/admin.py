@@ -0,0 +1,24 @@
+from django.contrib import admin
+from .models import DailySales, MonthlySales
+
+
+class SalesRollupAdmin(admin.ModelAdmin):
+    list_display = ('orders', 'units', 'revenue')
+
+    def has_add_permission(self, request):
+        # Rollups are only written by the build_sales_reports command
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(SalesRollupAdmin):
+    list_display = ('day',) + SalesRollupAdmin.list_display
+    date_hierarchy = 'day'
+
+
+@admin.register(MonthlySales)
+class MonthlySalesAdmin(SalesRollupAdmin):
+    list_display = ('month',) + SalesRollupAdmin.list_display
@@ -0,0 +1,6 @@
+from django.urls import path
+from .api_views import SalesReportAPIView
+
+urlpatterns = [
+    path('sales/', SalesReportAPIView.as_view(), name='api-reports-sales'),
+]
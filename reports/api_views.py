@@ -0,0 +1,75 @@
+from datetime import date
+
+from django.db.models import F, Sum
+from rest_framework import status, views
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from familyplus.db_router import ReadReplicaMixin
+from .models import DailySales, MonthlySales, DailyProductSales, MonthlyProductSales
+from .serializers import PeriodSalesSerializer, ProductSalesSerializer, CategorySalesSerializer
+
+# period -> (totals model, per-product model, date field)
+PERIODS = {
+    'daily': (DailySales, DailyProductSales, 'day'),
+    'monthly': (MonthlySales, MonthlyProductSales, 'month'),
+}
+GROUPS = ('total', 'product', 'category')
+
+
+def _parse_date(value):
+    return date.fromisoformat(value) if value else None
+
+
+class SalesReportAPIView(ReadReplicaMixin, views.APIView):
+    """
+    Staff-only sales report read from the rollup tables (see build_sales_reports).
+
+    Query params: period=daily|monthly, group=total|product|category,
+    start/end (YYYY-MM-DD, inclusive) and limit for the product/category groups.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        period = request.query_params.get('period', 'daily')
+        group = request.query_params.get('group', 'total')
+        if period not in PERIODS or group not in GROUPS:
+            return Response(
+                {"error": f"period must be one of {', '.join(PERIODS)} and group one of {', '.join(GROUPS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            start = _parse_date(request.query_params.get('start'))
+            end = _parse_date(request.query_params.get('end'))
+        except ValueError:
+            return Response({"error": "start and end must be dates (YYYY-MM-DD)."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 50)), 500))
+        except ValueError:
+            limit = 50
+
+        totals_model, product_model, date_field = PERIODS[period]
+        if period == 'monthly' and start:
+            start = start.replace(day=1)
+        filters = {}
+        if start:
+            filters[f'{date_field}__gte'] = start
+        if end:
+            filters[f'{date_field}__lte'] = end
+
+        if group == 'total':
+            rows = totals_model.objects.filter(**filters).order_by(date_field).values(
+                'orders', 'units', 'revenue', period=F(date_field)
+            )
+            return Response(PeriodSalesSerializer(rows, many=True).data)
+
+        sums = {'total_orders': Sum('orders'), 'total_units': Sum('units'), 'total_revenue': Sum('revenue')}
+        rows = product_model.objects.filter(**filters)
+        if group == 'product':
+            rows = rows.values('product_id', product_name=F('product__product_name'))
+            serializer_class = ProductSalesSerializer
+        else:
+            rows = rows.values('category_id', category_name=F('category__category_name'))
+            serializer_class = CategorySalesSerializer
+        rows = rows.annotate(**sums).order_by('-total_revenue')[:limit]
+        return Response(serializer_class(rows, many=True).data)
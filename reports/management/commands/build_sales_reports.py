@@ -0,0 +1,114 @@
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from store.watermarks import add_window_arguments, process_order_line_windows, reset_watermark
+from reports.models import DailySales, MonthlySales, DailyProductSales, MonthlyProductSales
+
+WATERMARK_NAME = 'sales_reports'
+CENT = Decimal('0.01')
+
+
+class Command(BaseCommand):
+    """
+    Django management command that fills the daily and monthly sales rollups.
+
+    OrderProduct rows above the stored high-water mark are streamed in the id
+    windows of store.watermarks, ordered by order so each order is counted once
+    per day and per product. Amounts are converted to Decimal line by line, and
+    the deltas of a window are added to the rollup tables in the same
+    transaction that moves the watermark.
+
+    Revenue is the sum of line prices times quantities (shipping excluded) and
+    is booked on the local date the order was created.
+    """
+    help = 'Incrementally builds daily/monthly revenue, order and unit rollups from OrderProduct.'
+
+    def add_arguments(self, parser):
+        add_window_arguments(parser)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['rebuild']:
+            reset_watermark(WATERMARK_NAME, (DailySales, MonthlySales, DailyProductSales, MonthlyProductSales))
+        processed, last_id = process_order_line_windows(
+            WATERMARK_NAME, lambda lines: self._apply_window(lines, options['chunk_size']),
+            window=options['window'], lag=options['lag'],
+        )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rolled up {processed} order lines up to id {last_id} in {elapsed:.2f}s.'
+        ))
+
+    def _apply_window(self, queryset, chunk_size):
+        # key -> [orders, units, revenue]
+        daily = defaultdict(lambda: [0, 0, Decimal(0)])
+        monthly = defaultdict(lambda: [0, 0, Decimal(0)])
+        daily_products = defaultdict(lambda: [0, 0, Decimal(0)])
+        monthly_products = defaultdict(lambda: [0, 0, Decimal(0)])
+        categories = {}
+        current_order = None
+        order_products = set()
+        count = 0
+
+        rows = queryset.order_by('order_id', 'id').values_list(
+            'order_id', 'order__created_at', 'product_id', 'product__category_id', 'quantity', 'product_price'
+        ).iterator(chunk_size=chunk_size)
+        for order_id, created_at, product_id, category_id, quantity, price in rows:
+            day = timezone.localtime(created_at).date()
+            month = day.replace(day=1)
+            revenue = (Decimal(str(price)) * quantity).quantize(CENT)
+            first_line_of_order = order_id != current_order
+            if first_line_of_order:
+                current_order = order_id
+                order_products = set()
+            first_line_of_product = product_id not in order_products
+            order_products.add(product_id)
+            categories[product_id] = category_id
+
+            for rollup, key, new_order in (
+                (daily, (day,), first_line_of_order),
+                (monthly, (month,), first_line_of_order),
+                (daily_products, (day, product_id), first_line_of_product),
+                (monthly_products, (month, product_id), first_line_of_product),
+            ):
+                totals = rollup[key]
+                totals[0] += new_order
+                totals[1] += quantity
+                totals[2] += revenue
+            count += 1
+
+        self._add(DailySales, ('day',), daily)
+        self._add(MonthlySales, ('month',), monthly)
+        self._add(DailyProductSales, ('day', 'product_id'), daily_products, categories)
+        self._add(MonthlyProductSales, ('month', 'product_id'), monthly_products, categories)
+        return count
+
+    def _add(self, model, key_fields, deltas, categories=None):
+        if not deltas:
+            return
+        lookup = {f'{field}__in': {key[index] for key in deltas} for index, field in enumerate(key_fields)}
+        existing = {
+            tuple(getattr(row, field) for field in key_fields): row
+            for row in model.objects.filter(**lookup)
+        }
+        to_update, to_create = [], []
+        for key, (orders, units, revenue) in deltas.items():
+            row = existing.get(key)
+            if row is None:
+                row = model(**dict(zip(key_fields, key)))
+                to_create.append(row)
+            else:
+                to_update.append(row)
+            row.orders += orders
+            row.units += units
+            row.revenue += revenue
+            if categories is not None:
+                row.category_id = categories[key[1]]
+        fields = ['orders', 'units', 'revenue'] + (['category'] if categories is not None else [])
+        model.objects.bulk_update(to_update, fields, batch_size=1000)
+        model.objects.bulk_create(to_create, batch_size=1000)
@@ -0,0 +1,64 @@
+from django.db import models
+from category.models import Category
+from store.models import Product
+
+
+class SalesRollup(models.Model):
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DailySales(SalesRollup):
+    day = models.DateField(unique=True)
+
+    class Meta:
+        verbose_name_plural = 'Daily sales'
+        ordering = ['-day']
+
+    def __str__(self):
+        return str(self.day)
+
+
+class MonthlySales(SalesRollup):
+    # First day of the month
+    month = models.DateField(unique=True)
+
+    class Meta:
+        verbose_name_plural = 'Monthly sales'
+        ordering = ['-month']
+
+    def __str__(self):
+        return self.month.strftime('%Y-%m')
+
+
+class DailyProductSales(SalesRollup):
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    # Category of the product when the sale was rolled up
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+
+    class Meta:
+        verbose_name_plural = 'Daily product sales'
+        unique_together = ('day', 'product')
+        indexes = [models.Index(fields=['day', 'category'], name='daily_sales_category_idx')]
+
+    def __str__(self):
+        return f"{self.day} {self.product_id}"
+
+
+class MonthlyProductSales(SalesRollup):
+    month = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+
+    class Meta:
+        verbose_name_plural = 'Monthly product sales'
+        unique_together = ('month', 'product')
+        indexes = [models.Index(fields=['month', 'category'], name='monthly_sales_category_idx')]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.product_id}"
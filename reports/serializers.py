@@ -0,0 +1,29 @@
+from rest_framework import serializers
+
+
+class SalesTotalsSerializer(serializers.Serializer):
+    orders = serializers.IntegerField()
+    units = serializers.IntegerField()
+    # Strings in the JSON output, so amounts never pass through a float
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class PeriodSalesSerializer(SalesTotalsSerializer):
+    period = serializers.DateField()
+
+
+class GroupedSalesSerializer(serializers.Serializer):
+    # Sums over the requested range; annotations cannot reuse the column names
+    orders = serializers.IntegerField(source='total_orders')
+    units = serializers.IntegerField(source='total_units')
+    revenue = serializers.DecimalField(source='total_revenue', max_digits=14, decimal_places=2)
+
+
+class ProductSalesSerializer(GroupedSalesSerializer):
+    product_id = serializers.IntegerField()
+    product_name = serializers.CharField()
+
+
+class CategorySalesSerializer(GroupedSalesSerializer):
+    category_id = serializers.IntegerField()
+    category_name = serializers.CharField()
@@ -0,0 +1,76 @@
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import Account
+from category.models import Category
+from orders.models import Order, OrderProduct
+from store.models import Product
+from .models import DailySales, MonthlySales, DailyProductSales, MonthlyProductSales
+
+
+class SalesReportTests(TestCase):
+    def setUp(self):
+        self.user = Account.objects.create_user('Asha', 'Nair', 'asha', 'asha@example.com', 'secret-pass-123')
+        toys = Category.objects.create(category_name='Toys', slug='toys')
+        books = Category.objects.create(category_name='Books', slug='books')
+        self.ball = Product.objects.create(product_name='Ball', slug='ball', price=10, stock=50, category=toys)
+        self.atlas = Product.objects.create(product_name='Atlas', slug='atlas', price=30, stock=50, category=books)
+
+    def _order(self, day, *lines):
+        order = Order.objects.create(
+            user=self.user, first_name='Asha', last_name='Nair', phone='9999999999', email='asha@example.com',
+            address_line_1='1 Main St', country='IN', state='KL', city='Kochi', order_total=0, shipping=40,
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.make_aware(datetime(2024, 1, day, 12)))
+        for product, quantity, price in lines:
+            OrderProduct.objects.create(
+                order=order, user=self.user, product=product, quantity=quantity, product_price=price, ordered=True,
+            )
+
+    def _build(self, **options):
+        call_command('build_sales_reports', lag=0, window=2, chunk_size=1, stdout=StringIO(), **options)
+
+    def test_incremental_rollups_count_orders_once(self):
+        # Float prices that are not exact in binary must still add up to exact cents
+        self._order(5, (self.ball, 3, 10.1), (self.ball, 1, 10.1), (self.atlas, 1, 30.0))
+        self._build()
+        self._order(5, (self.ball, 1, 10.1))
+        self._order(20, (self.atlas, 2, 29.99))
+        self._build()
+        self._build()
+
+        day = DailySales.objects.get(day='2024-01-05')
+        self.assertEqual((day.orders, day.units, day.revenue), (2, 6, Decimal('80.50')))
+        ball = DailyProductSales.objects.get(day='2024-01-05', product=self.ball)
+        self.assertEqual((ball.orders, ball.units, ball.revenue), (2, 5, Decimal('50.50')))
+        month = MonthlySales.objects.get(month='2024-01-01')
+        self.assertEqual((month.orders, month.units, month.revenue), (3, 8, Decimal('140.48')))
+        self.assertEqual(MonthlyProductSales.objects.get(product=self.atlas).revenue, Decimal('89.98'))
+
+        self._build(rebuild=True)
+        self.assertEqual(MonthlySales.objects.get(month='2024-01-01').revenue, Decimal('140.48'))
+
+    def test_staff_api(self):
+        self._order(5, (self.ball, 2, 10.0))
+        self._order(20, (self.atlas, 1, 25.0), (self.ball, 1, 10.0))
+        self._build()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get('/api/reports/sales/').status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        daily = client.get('/api/reports/sales/?start=2024-01-06').json()
+        self.assertEqual(daily, [{'period': '2024-01-20', 'orders': 1, 'units': 2, 'revenue': '35.00'}])
+        categories = client.get('/api/reports/sales/?period=monthly&group=category&start=2024-01-15').json()
+        # Monthly ranges start on the first of the month
+        self.assertEqual([(row['category_name'], row['revenue']) for row in categories], [('Toys', '30.00'), ('Books', '25.00')])
+        products = client.get('/api/reports/sales/?group=product&limit=1').json()
+        self.assertEqual([(row['product_name'], row['orders'], row['revenue']) for row in products], [('Ball', 2, '30.00')])
+        self.assertEqual(client.get('/api/reports/sales/?period=weekly').status_code, 400)
@@ -1,6 +1,9 @@
 from django.contrib import admin
 from .models import Product, Variation, ReviewRating, ProductGallery
 import admin_thumbnails
+from familyplus.exports import make_export_actions
+from familyplus.pagination import LargeTablePaginator
+from .exports import export_products
 
 
 @admin_thumbnails.thumbnail('image')
@@ -17,22 +20,35 @@ class ProductAdmin(admin.ModelAdmin):
     )
     prepopulated_fields = {'slug': ('product_name',)}
     list_filter = ('category', 'is_available')
+    list_select_related = ('category',)
     search_fields = ('product_name', 'category__category_name')
     ordering = ('-created_date',)
+    paginator = LargeTablePaginator
+    show_full_result_count = False
     inlines = [ProductGalleryInline]
+    actions = make_export_actions(export_products)
 
 
 class VariationAdmin(admin.ModelAdmin):
     list_display = ('product', 'variation_category', 'variation_value', 'is_active')
     list_editable = ('is_active',)
-    list_filter = ('product', 'variation_category', 'variation_value')
+    # A product filter would list the whole catalog in the sidebar; search by product name instead
+    list_filter = ('variation_category', 'is_active')
+    list_select_related = ('product',)
     search_fields = ('product__product_name', 'variation_value')
+    autocomplete_fields = ('product',)
+    paginator = LargeTablePaginator
+    show_full_result_count = False
 
 
 class ReviewRatingAdmin(admin.ModelAdmin):
     list_display = ('product', 'user', 'rating', 'subject', 'status', 'created_at')
     list_filter = ('rating', 'status', 'created_at')
+    list_select_related = ('product', 'user')
     search_fields = ('user__email', 'product__product_name', 'subject')
+    autocomplete_fields = ('product', 'user')
+    paginator = LargeTablePaginator
+    show_full_result_count = False
 
 
 admin.site.register(Product, ProductAdmin)
@@ -0,0 +1,118 @@
+"""
+Buffered product-view and search counters.
+
+Catalog requests only bump an in-memory counter of their worker process;
+nothing is written per hit. The buffered deltas are flushed when the oldest
+one is ANALYTICS_FLUSH_INTERVAL seconds old or ANALYTICS_FLUSH_EVENTS events
+have been recorded (by the request that crosses the threshold), and at
+process exit. A flush is one INSERT ... ON CONFLICT DO UPDATE SET count =
+count + delta per table and batch (PostgreSQL and SQLite), so workers add to
+the same daily rows without reading them. The rollup_analytics command turns
+the daily rows into Product.popularity.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Product, ProductViewDaily, SearchTermDaily
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement; 3 parameters each stays under SQLite's variable limit
+UPSERT_BATCH_SIZE = 300
+MAX_TERM_LENGTH = SearchTermDaily._meta.get_field('term').max_length
+
+_views = {}  # (date, product_id) -> delta
+_searches = {}  # (date, term) -> delta
+_state = {'events': 0, 'oldest': None}
+_lock = threading.Lock()
+
+
+def normalize_term(term):
+    return ' '.join(term.lower().split())[:MAX_TERM_LENGTH]
+
+
+def _record(counters, key):
+    with _lock:
+        counters[key] = counters.get(key, 0) + 1
+        _state['events'] += 1
+        if _state['oldest'] is None:
+            _state['oldest'] = time.monotonic()
+        due = (
+            _state['events'] >= settings.ANALYTICS_FLUSH_EVENTS
+            or time.monotonic() - _state['oldest'] >= settings.ANALYTICS_FLUSH_INTERVAL
+        )
+    if due:
+        flush()
+
+
+def record_product_view(product_id):
+    _record(_views, (timezone.localdate(), product_id))
+
+
+def record_search(term):
+    term = normalize_term(term)
+    if term:
+        _record(_searches, (timezone.localdate(), term))
+
+
+def _take():
+    with _lock:
+        views, searches = dict(_views), dict(_searches)
+        _views.clear()
+        _searches.clear()
+        _state.update(events=0, oldest=None)
+    return views, searches
+
+
+def _upsert(model, key_columns, deltas):
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = [connection.ops.quote_name(column) for column in (*key_columns, 'count')]
+    count = columns[-1]
+    rows = [(connection.ops.adapt_datefield_value(date), key, delta) for (date, key), delta in deltas.items()]
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        values = ', '.join(['(%s, %s, %s)'] * len(batch))
+        sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} "
+            f"ON CONFLICT ({', '.join(columns[:-1])}) DO UPDATE SET {count} = {table}.{count} + EXCLUDED.{count}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [value for row in batch for value in row])
+
+
+def flush():
+    """Writes the buffered deltas of this process; on failure they are kept for the next flush."""
+    views, searches = _take()
+    if not views and not searches:
+        return
+    try:
+        with transaction.atomic():
+            if views:
+                # Products deleted since the views were counted would fail the foreign key
+                existing = set(Product.objects.filter(
+                    id__in={product_id for _, product_id in views}
+                ).values_list('id', flat=True))
+                views = {key: delta for key, delta in views.items() if key[1] in existing}
+                _upsert(ProductViewDaily, ('date', 'product_id'), views)
+            if searches:
+                _upsert(SearchTermDaily, ('date', 'term'), searches)
+    except Exception:
+        logger.exception("Analytics flush failed; keeping %s counters for the next one", len(views) + len(searches))
+        with _lock:
+            for counters, deltas in ((_views, views), (_searches, searches)):
+                for key, delta in deltas.items():
+                    counters[key] = counters.get(key, 0) + delta
+
+
+def discard():
+    """Drops the buffered counters without writing them (tests)."""
+    _take()
+
+
+atexit.register(flush)
@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .api_views import CategoryViewSet, ProductViewSet
+from .api_views import (
+    CategoryViewSet, ProductViewSet, HomeAPIView, TopSellersAPIView, ProductExportAPIView, AutocompleteAPIView
+)
 
 # Initialize the router
 router = DefaultRouter()
@@ -11,5 +13,9 @@ router.register(r'products', ProductViewSet, basename='product')
 
 # The API URLs are now determined automatically by the router
 urlpatterns = [
+    path('home/', HomeAPIView.as_view(), name='api-store-home'),
+    path('autocomplete/', AutocompleteAPIView.as_view(), name='api-store-autocomplete'),
+    path('top-sellers/', TopSellersAPIView.as_view(), name='api-store-top-sellers'),
+    path('products/export/', ProductExportAPIView.as_view(), name='api-product-export'),
     path('', include(router.urls)),
 ]
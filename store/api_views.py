@@ -1,21 +1,63 @@
-from rest_framework import viewsets
+from django.conf import settings
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from rest_framework import viewsets, views, status
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
 from category.models import Category
-from .models import Product
-from .serializers import CategorySerializer, ProductSerializer
+from familyplus.db_router import ReadReplicaMixin
+from familyplus.exports import StreamingExportAPIView
+from familyplus.pagination import CategoryPagination, ProductPagination
+from orders.models import OrderProduct
+from .models import Product, Variation, ReviewRating, CoPurchase, ProductSales, ProductRatingSummary, REVIEWS_PAGE_SIZE
+from .serializers import (
+    CategorySerializer, ProductSerializer, ProductDetailSerializer, ProductCardSerializer, ProductAvailabilitySerializer,
+    ReviewSerializer, ProductRatingSummarySerializer,
+)
+from .analytics import record_product_view
+from .autocomplete import suggest
+from .availability import get_availability
+from .filters import filter_products, get_facets, parse_filters
+from .snapshots import get_home_snapshot
+from .exports import export_products
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+MAX_AVAILABILITY_IDS = 200
+AUTOCOMPLETE_CACHE_SECONDS = 60
+
+class ReviewPagination(CursorPagination):
+    # Keyset pagination: deep pages of a popular product cost the same as the first
+    ordering = ('-created_at', '-id')
+    page_size = REVIEWS_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+def _get_limit(request, default=8, maximum=50):
+    try:
+        return max(1, min(int(request.query_params.get('limit', default)), maximum))
+    except ValueError:
+        return default
+
+class CategoryViewSet(ReadReplicaMixin, viewsets.ReadOnlyModelViewSet):
     """
     A read-only viewset for viewing categories.
     """
-    queryset = Category.objects.all()
+    queryset = Category.objects.order_by('id')
     serializer_class = CategorySerializer
+    pagination_class = CategoryPagination
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductViewSet(ReadReplicaMixin, viewsets.ReadOnlyModelViewSet):
     """
     A read-only viewset for viewing available products.
-    Includes filtering by category_slug and optimizes database queries.
+    Supports the catalog filters and sorts of store.filters (category_slug,
+    price range, in_stock, color/size, min_rating, sort) and optimizes database queries.
     """
     serializer_class = ProductSerializer
+    pagination_class = ProductPagination
+    lookup_value_regex = '[0-9]+'
 
     def get_queryset(self):
         # Base queryset: only available products
@@ -25,11 +67,156 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         ).prefetch_related(
             'variation_set', 
             'productgallery_set'
-        ).order_by('id')
+        )
+        if self.action != 'list':
+            return queryset.order_by('id')
+        try:
+            return filter_products(queryset, self.request.query_params)
+        except ValueError as exc:
+            raise ValidationError({"error": str(exc)})
+
+    @action(detail=False, url_path='facets')
+    def facets(self, request):
+        """
+        Counts per category, color, size and price bucket for the products matching
+        the same filters as the list; one grouped query, cached per filter combination.
+        """
+        try:
+            filters = parse_filters(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_facets(filters))
+
+    @action(detail=True, url_path='related')
+    def related(self, request, pk=None):
+        """Products most often bought together with this one (precomputed by build_recommendations)."""
+        co_purchases = CoPurchase.objects.filter(
+            product_id=pk, related_product__is_available=True
+        ).select_related('related_product__category').order_by('-count')[:_get_limit(request)]
+        products = [row.related_product for row in co_purchases]
+        return Response(ProductCardSerializer(products, many=True, context={'request': request}).data)
+
+    @action(detail=True, url_path='reviews')
+    def reviews(self, request, pk=None):
+        """
+        Approved reviews, newest first, in keyset pages (?cursor=), plus the
+        product's rating summary (count, average, 1-5 star histogram) from
+        ProductRatingSummary; two queries per page.
+        """
+        product = get_object_or_404(Product.objects.filter(is_available=True).select_related('rating_summary'), pk=pk)
+        try:
+            summary = product.rating_summary
+        except ProductRatingSummary.DoesNotExist:
+            summary = ProductRatingSummary(product=product)
 
-        # Optional filtering by category_slug
-        category_slug = self.request.query_params.get('category_slug', None)
+        paginator = ReviewPagination()
+        reviews = ReviewRating.objects.filter(product=product, status=True).select_related('user')
+        page = paginator.paginate_queryset(reviews, request, view=self)
+        response = paginator.get_paginated_response(ReviewSerializer(page, many=True).data)
+        response.data['summary'] = ProductRatingSummarySerializer(summary).data
+        return response
+
+    @action(
+        detail=False,
+        url_path=r'by-slug/(?:(?P<category_slug>[-\w]+)/)?(?P<product_slug>[-\w]+)',
+        serializer_class=ProductDetailSerializer,
+    )
+    def by_slug(self, request, product_slug, category_slug=None):
+        """
+        Product page by slug (/by-slug/<category_slug>/<product_slug>/ or /by-slug/<product_slug>/):
+        product, gallery, grouped variations, the first REVIEWS_PAGE_SIZE approved reviews
+        and already_purchased, in four queries (five when authenticated).
+        """
+        reviews = ReviewRating.objects.filter(status=True).select_related('user').order_by('-created_at', '-id')
+        products = Product.objects.filter(is_available=True).select_related('category').prefetch_related(
+            'productgallery_set',
+            Prefetch('variation_set', queryset=Variation.objects.filter(is_active=True)),
+            Prefetch('reviewrating_set', queryset=reviews[:REVIEWS_PAGE_SIZE], to_attr='first_reviews'),
+        )
         if category_slug is not None:
+            products = products.filter(category__slug=category_slug)
+        product = get_object_or_404(products, slug=product_slug)
+        record_product_view(product.id)
+
+        already_purchased = request.user.is_authenticated and OrderProduct.objects.filter(
+            user=request.user, product=product, ordered=True
+        ).exists()
+        serializer = ProductDetailSerializer(product, context={'request': request, 'already_purchased': already_purchased})
+        return Response(serializer.data)
+
+    @action(detail=False, url_path='availability')
+    def availability(self, request):
+        """
+        Price, stock and availability for ?ids=1,2,3 (at most MAX_AVAILABILITY_IDS) in one query.
+        Unknown ids are left out of the response.
+        """
+        try:
+            ids = list(dict.fromkeys(int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()))
+        except ValueError:
+            return Response({"error": "ids must be a comma-separated list of product ids."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > MAX_AVAILABILITY_IDS:
+            return Response({"error": f"At most {MAX_AVAILABILITY_IDS} ids per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = get_availability(ids)
+        response = Response(ProductAvailabilitySerializer([rows[i] for i in ids if i in rows], many=True).data)
+        patch_cache_control(response, public=True, max_age=settings.PRODUCT_AVAILABILITY_TTL)
+        return response
+
+class AutocompleteAPIView(views.APIView):
+    """
+    Typeahead suggestions for ?q= (products and categories with a word starting
+    with it, most popular first, ?limit= up to 20) from the in-process index of
+    store.autocomplete; no database query.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        response = Response(suggest(request.query_params.get('q', ''), _get_limit(request, maximum=20)))
+        patch_cache_control(response, public=True, max_age=AUTOCOMPLETE_CACHE_SECONDS)
+        return response
+
+class HomeAPIView(views.APIView):
+    """
+    Home page payload (latest products, featured categories, top-rated products)
+    served from the precomputed snapshot; it is never built inside the request.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        entry = get_home_snapshot()
+        if entry is None:
+            # First deploy: a background build has just been queued
+            data = {'latest_products': [], 'featured_categories': [], 'top_rated_products': [], 'built_at': None}
+        else:
+            data = dict(entry['payload'], built_at=entry['built_at'])
+        response = Response(data)
+        patch_cache_control(response, public=True, max_age=60)
+        return response
+
+class TopSellersAPIView(ReadReplicaMixin, views.APIView):
+    """
+    Best-selling products, overall or within ?category=<slug>,
+    read from the precomputed ProductSales ranking.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        sales = ProductSales.objects.filter(product__is_available=True)
+        category_slug = request.query_params.get('category')
+        if category_slug:
+            category = get_object_or_404(Category, slug=category_slug)
+            sales = sales.filter(category=category)
+        sales = sales.select_related('product__category').order_by('-units_sold')[:_get_limit(request)]
+        products = [row.product for row in sales]
+        return Response(ProductCardSerializer(products, many=True, context={'request': request}).data)
+
+class ProductExportAPIView(StreamingExportAPIView):
+    """Streams the full catalog (including unavailable products) as CSV or JSON Lines, optionally ?category=<slug>."""
+    queryset = Product.objects.all()
+    export = staticmethod(export_products)
+
+    def filter_queryset(self, queryset):
+        category_slug = self.request.query_params.get('category')
+        if category_slug:
             queryset = queryset.filter(category__slug=category_slug)
-            
         return queryset
@@ -0,0 +1,222 @@
+"""
+In-process typeahead index over product and category names.
+
+Every name is normalized (lower-case words) and indexed under the whole name
+and under each of its word suffixes ("red kite" and "kite"), in one sorted
+list searched with bisect. A lookup is a binary search plus a scan of the
+matching range, and the results of one- and two-character prefixes are
+memoized, so no request touches the database. Categories rank by the summed
+popularity of their products.
+
+The index is built from one values_list query, in gunicorn's when_ready
+hook before the workers fork (gunicorn.conf.py), or by the first lookup of a
+process that has none. store.signals applies Product and Category writes to
+it on commit. Writes that send no signals (bulk_update from sync_inventory or
+rollup_analytics) are picked up by a full rebuild in a background thread once
+the index is AUTOCOMPLETE_MAX_AGE seconds old; lookups keep using the old
+index until the new one is swapped in.
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+SHORT_PREFIX = 2
+
+_entries = {}  # ('product' | 'category', id) -> entry dict
+_keys = []  # sorted (normalized key, entry key)
+_short_results = {}  # (prefix, limit) -> results of a prefix of at most SHORT_PREFIX characters
+_state = {'built_at': None, 'refreshing': False}
+_lock = threading.RLock()
+# Held while a process without any index builds its first one
+_build_lock = threading.Lock()
+
+
+def normalize(text):
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+def _index_keys(name):
+    words = normalize(name).split()
+    return {' '.join(words[start:]) for start in range(len(words))}
+
+
+def _add(entry_key, entry):
+    _entries[entry_key] = entry
+    for key in _index_keys(entry['name']):
+        bisect.insort(_keys, (key, entry_key))
+
+
+def _remove(entry_key):
+    entry = _entries.pop(entry_key, None)
+    if entry is None:
+        return None
+    for key in _index_keys(entry['name']):
+        position = bisect.bisect_left(_keys, (key, entry_key))
+        if position < len(_keys) and _keys[position] == (key, entry_key):
+            del _keys[position]
+    return entry
+
+
+def _category_entry(category_id, name, slug):
+    return {'type': 'category', 'id': category_id, 'name': name, 'slug': slug, 'popularity': 0, 'products': 0}
+
+
+def _attach_to_category(product, category_id, name=None, slug=None, sign=1):
+    category = _entries.get(('category', category_id))
+    if category is None:
+        if sign < 0 or name is None:
+            return
+        category = _category_entry(category_id, name, slug)
+        _add(('category', category_id), category)
+    category['popularity'] += sign * product['popularity']
+    category['products'] += sign
+    if category['products'] <= 0:
+        _remove(('category', category_id))
+
+
+def build_index():
+    """(Re)builds the whole index from one query over the available products."""
+    rows = Product.objects.filter(is_available=True).values_list(
+        'id', 'product_name', 'slug', 'popularity', 'category_id', 'category__category_name', 'category__slug'
+    )
+    entries = {}
+    for product_id, name, slug, popularity, category_id, category_name, category_slug in rows:
+        entries[('product', product_id)] = {
+            'type': 'product', 'id': product_id, 'name': name, 'slug': slug,
+            'popularity': popularity, 'category_id': category_id, 'category_slug': category_slug,
+        }
+        category = entries.setdefault(('category', category_id), _category_entry(category_id, category_name, category_slug))
+        category['popularity'] += popularity
+        category['products'] += 1
+    keys = sorted((key, entry_key) for entry_key, entry in entries.items() for key in _index_keys(entry['name']))
+
+    global _entries, _keys
+    with _lock:
+        _entries, _keys = entries, keys
+        _short_results.clear()
+        _state['built_at'] = time.monotonic()
+
+
+def _refresh_index():
+    try:
+        build_index()
+    except Exception:
+        logger.exception("Autocomplete index refresh failed")
+    finally:
+        with _lock:
+            _state['refreshing'] = False
+        connection.close()
+
+
+def _ensure_index():
+    if _state['built_at'] is None:
+        # Nothing to serve yet: one lookup builds the index, concurrent ones wait for it
+        with _build_lock:
+            if _state['built_at'] is None:
+                build_index()
+        return
+    if time.monotonic() - _state['built_at'] > settings.AUTOCOMPLETE_MAX_AGE:
+        with _lock:
+            if _state['refreshing']:
+                return
+            _state['refreshing'] = True
+        threading.Thread(target=_refresh_index, daemon=True).start()
+
+
+def _result(entry):
+    result = {'type': entry['type'], 'name': entry['name'], 'slug': entry['slug']}
+    if entry['type'] == 'product':
+        result['category_slug'] = entry['category_slug']
+    return result
+
+
+def suggest(query, limit=8):
+    """The ``limit`` most popular products and categories whose name has a word starting with ``query``."""
+    prefix = normalize(query)
+    if not prefix:
+        return []
+    _ensure_index()
+    with _lock:
+        short = len(prefix) <= SHORT_PREFIX
+        if short and (prefix, limit) in _short_results:
+            return _short_results[(prefix, limit)]
+
+        matches = set()
+        position = bisect.bisect_left(_keys, (prefix,))
+        while position < len(_keys) and _keys[position][0].startswith(prefix):
+            matches.add(_keys[position][1])
+            position += 1
+        top = heapq.nsmallest(
+            limit, (_entries[entry_key] for entry_key in matches),
+            key=lambda entry: (-entry['popularity'], entry['name']),
+        )
+        results = [_result(entry) for entry in top]
+        if short:
+            _short_results[(prefix, limit)] = results
+        return results
+
+
+def update_product(product):
+    """Applies a saved Product (name, slug, category, availability, popularity) to a built index."""
+    with _lock:
+        if _state['built_at'] is None:
+            return
+        old = _remove(('product', product.pk))
+        if old is not None:
+            _attach_to_category(old, old['category_id'], sign=-1)
+        if product.is_available:
+            category = product.category
+            entry = {
+                'type': 'product', 'id': product.pk, 'name': product.product_name, 'slug': product.slug,
+                'popularity': product.popularity, 'category_id': category.pk, 'category_slug': category.slug,
+            }
+            _add(('product', product.pk), entry)
+            _attach_to_category(entry, category.pk, category.category_name, category.slug)
+        _short_results.clear()
+
+
+def remove_product(product_id):
+    with _lock:
+        old = _remove(('product', product_id))
+        if old is not None:
+            _attach_to_category(old, old['category_id'], sign=-1)
+            _short_results.clear()
+
+
+def update_category(category):
+    """Applies a renamed category to its own entry and to the category_slug of its products."""
+    with _lock:
+        entry = _remove(('category', category.pk))
+        if entry is None:
+            return
+        entry.update(name=category.category_name, slug=category.slug)
+        _add(('category', category.pk), entry)
+        for product in _entries.values():
+            if product['type'] == 'product' and product['category_id'] == category.pk:
+                product['category_slug'] = category.slug
+        _short_results.clear()
+
+
+def remove_category(category_id):
+    with _lock:
+        if _remove(('category', category_id)) is not None:
+            _short_results.clear()
+
+
+def reset():
+    """Forgets the index; the next lookup rebuilds it (tests)."""
+    with _lock:
+        _entries.clear()
+        _keys.clear()
+        _short_results.clear()
+        _state.update(built_at=None, refreshing=False)
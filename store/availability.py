@@ -0,0 +1,62 @@
+"""
+Price and stock lookups for many products at once.
+
+Rows come from one values_list query and are kept in a small per-process
+cache for PRODUCT_AVAILABILITY_TTL seconds. Saving or deleting a Product and
+moving stock at payment invalidate the entries of this process on commit;
+other workers see the change once their entries expire, so the TTL bounds
+how stale an answer can be.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Product
+
+MAX_ENTRIES = 10000
+
+_entries = {}  # product id -> (expires_at, row or None when the product does not exist)
+_lock = threading.Lock()
+
+
+def get_availability(product_ids):
+    """Returns {product_id: {'id', 'price', 'stock', 'is_available'}} for the ids that exist."""
+    now = time.monotonic()
+    found = {}
+    missing = []
+    with _lock:
+        for product_id in product_ids:
+            entry = _entries.get(product_id)
+            if entry is not None and entry[0] > now:
+                found[product_id] = entry[1]
+            else:
+                missing.append(product_id)
+
+    if missing:
+        rows = {
+            product_id: {'id': product_id, 'price': price, 'stock': stock, 'is_available': is_available}
+            for product_id, price, stock, is_available in Product.objects.filter(id__in=missing).values_list(
+                'id', 'price', 'stock', 'is_available'
+            )
+        }
+        expires_at = now + settings.PRODUCT_AVAILABILITY_TTL
+        with _lock:
+            if len(_entries) + len(missing) > MAX_ENTRIES:
+                _entries.clear()
+            for product_id in missing:
+                row = rows.get(product_id)
+                _entries[product_id] = (expires_at, row)
+                found[product_id] = row
+
+    return {product_id: row for product_id, row in found.items() if row is not None}
+
+
+def invalidate_availability(product_ids=None):
+    """Drops the cached rows of ``product_ids``, or every row when None."""
+    with _lock:
+        if product_ids is None:
+            _entries.clear()
+        else:
+            for product_id in product_ids:
+                _entries.pop(product_id, None)
@@ -0,0 +1,29 @@
+from familyplus.exports import CHUNK_SIZE, merge_labels, stream_export
+from .models import Variation
+
+PRODUCT_COLUMNS = (
+    ('id', 'id'),
+    ('product_name', 'product_name'),
+    ('slug', 'slug'),
+    ('category', 'category__category_name'),
+    ('price', 'price'),
+    ('stock', 'stock'),
+    ('is_available', 'is_available'),
+    ('rating_average', 'rating_average'),
+    ('rating_count', 'rating_count'),
+    ('created_date', 'created_date'),
+)
+
+
+def export_products(queryset, export_format='csv'):
+    rows = queryset.order_by('id').values_list(
+        *(lookup for _, lookup in PRODUCT_COLUMNS)
+    ).iterator(chunk_size=CHUNK_SIZE)
+    variations = Variation.objects.filter(
+        product_id__in=queryset.values('id'), is_active=True
+    ).order_by('product_id', 'id').values_list(
+        'product_id', 'variation_category', 'variation_value'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    labels = ((product_id, f"{category}: {value}") for product_id, category, value in variations)
+    header = [name for name, _ in PRODUCT_COLUMNS] + ['variations']
+    return stream_export(header, merge_labels(rows, labels), 'products', export_format)
@@ -0,0 +1,190 @@
+"""
+Server-side catalog filters, sorting and facet counts.
+
+Query parameters (all optional, shared by /api/store/products/, its facets/
+action and the legacy store view):
+
+    category_slug   one or more category slugs, comma-separated
+    min_price       inclusive lower price bound
+    max_price       inclusive upper price bound
+    in_stock        true: only products with stock left
+    color, size     one or more variation values, comma-separated
+    min_rating      minimum approved-review average (0-5)
+    sort            price, -price, newest, rating or popular (default: id)
+
+Facet counts (per category, color, size and price bucket) are computed for
+the filtered products in one UNION ALL of grouped queries and cached per
+filter combination under a version number that catalog writes bump (see
+store.signals), so a stale combination is simply never read again. The
+version lives in the default cache: every worker sees a bump only when that
+cache is shared (CACHE_URL); otherwise PRODUCT_FACETS_TTL bounds staleness.
+"""
+import hashlib
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, Exists, F, OuterRef, Value, When
+
+from .models import Product, Variation
+
+# Upper bounds of the price buckets; the last bucket is open-ended
+PRICE_BUCKETS = (25, 50, 100, 250)
+SORTS = {
+    'price': ('price', 'id'),
+    '-price': ('-price', 'id'),
+    'newest': ('-created_date', '-id'),
+    'rating': ('-rating_average', '-rating_count', 'id'),
+    'popular': ('-popularity', 'id'),
+}
+FACETS = ('category', 'color', 'size', 'price')
+FACETS_VERSION_KEY = 'store:facets:version'
+
+_TRUE = {'1', 'true', 'yes', 'on'}
+_FALSE = {'0', 'false', 'no', 'off', ''}
+
+
+def _values(params, name):
+    return tuple(sorted({value.strip() for value in params.get(name, '').split(',') if value.strip()}))
+
+
+def _decimal(params, name):
+    value = params.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a number.")
+    if not number.is_finite() or number < 0:
+        raise ValueError(f"{name} must be a positive number.")
+    return number
+
+
+def parse_filters(params):
+    """
+    Validates the catalog query parameters and returns them normalized (sorted
+    value tuples, Decimals); raises ValueError with a client-facing message.
+    """
+    filters = {
+        'category_slug': _values(params, 'category_slug'),
+        'min_price': _decimal(params, 'min_price'),
+        'max_price': _decimal(params, 'max_price'),
+        'color': _values(params, 'color'),
+        'size': _values(params, 'size'),
+        'sort': params.get('sort', '').strip() or None,
+    }
+    if filters['min_price'] is not None and filters['max_price'] is not None and filters['min_price'] > filters['max_price']:
+        raise ValueError("min_price cannot be greater than max_price.")
+
+    in_stock = params.get('in_stock', '').strip().lower()
+    if in_stock not in _TRUE | _FALSE:
+        raise ValueError("in_stock must be true or false.")
+    filters['in_stock'] = in_stock in _TRUE
+
+    min_rating = params.get('min_rating', '').strip()
+    try:
+        filters['min_rating'] = float(min_rating) if min_rating else None
+    except ValueError:
+        raise ValueError("min_rating must be a number.")
+    if filters['min_rating'] is not None and not 0 <= filters['min_rating'] <= 5:
+        raise ValueError("min_rating must be between 0 and 5.")
+
+    if filters['sort'] is not None and filters['sort'] not in SORTS:
+        raise ValueError(f"sort must be one of {', '.join(SORTS)}.")
+    return filters
+
+
+def _variation_exists(category, values):
+    return Exists(Variation.objects.filter(
+        product=OuterRef('pk'), variation_category=category, variation_value__in=values, is_active=True,
+    ))
+
+
+def apply_filters(queryset, filters):
+    """Narrows a Product queryset with parsed filters; variation filters are EXISTS subqueries, so rows never repeat."""
+    if filters['category_slug']:
+        queryset = queryset.filter(category__slug__in=filters['category_slug'])
+    if filters['min_price'] is not None:
+        queryset = queryset.filter(price__gte=filters['min_price'])
+    if filters['max_price'] is not None:
+        queryset = queryset.filter(price__lte=filters['max_price'])
+    if filters['in_stock']:
+        queryset = queryset.filter(stock__gt=0)
+    if filters['min_rating'] is not None:
+        queryset = queryset.filter(rating_average__gte=filters['min_rating'])
+    for category in ('color', 'size'):
+        if filters[category]:
+            queryset = queryset.filter(_variation_exists(category, filters[category]))
+    return queryset
+
+
+def apply_sort(queryset, sort):
+    return queryset.order_by(*SORTS.get(sort, ('id',)))
+
+
+def filter_products(queryset, params):
+    """parse_filters + apply_filters + apply_sort for a request's query parameters."""
+    filters = parse_filters(params)
+    return apply_sort(apply_filters(queryset, filters), filters['sort'])
+
+
+def _price_bucket():
+    whens = []
+    lower = 0
+    for upper in PRICE_BUCKETS:
+        whens.append(When(price__lt=upper, then=Value(f'{lower}-{upper}')))
+        lower = upper
+    return Case(*whens, default=Value(f'{lower}+'), output_field=CharField())
+
+
+def _grouped(queryset, dimension, value, count):
+    # (dimension, value, count) rows; the same three columns in every part of the UNION
+    return queryset.annotate(dimension=dimension, value=value).values('dimension', 'value').annotate(
+        count=count
+    ).values_list('dimension', 'value', 'count').order_by()
+
+
+def compute_facets(filters):
+    """{facet: [{'value', 'count'}, ...]} for the available products matching ``filters``; one query."""
+    products = apply_filters(Product.objects.filter(is_available=True), filters)
+    variations = Variation.objects.filter(is_active=True, product__in=products.values('id'))
+    rows = _grouped(products, Value('category', output_field=CharField()), F('category__slug'), Count('id')).union(
+        _grouped(products, Value('price', output_field=CharField()), _price_bucket(), Count('id')),
+        # The variation category ('color' / 'size') is the facet name
+        _grouped(variations, F('variation_category'), F('variation_value'), Count('product_id', distinct=True)),
+        all=True,
+    )
+
+    facets = {facet: [] for facet in FACETS}
+    for dimension, value, count in rows:
+        if dimension in facets:
+            facets[dimension].append({'value': value, 'count': count})
+    for facet, buckets in facets.items():
+        if facet == 'price':
+            buckets.sort(key=lambda bucket: int(bucket['value'].split('-')[0].rstrip('+')))
+        else:
+            buckets.sort(key=lambda bucket: (-bucket['count'], bucket['value']))
+    return facets
+
+
+def get_facets(filters):
+    """compute_facets(), cached for PRODUCT_FACETS_TTL seconds per filter combination and catalog version."""
+    version = cache.get_or_set(FACETS_VERSION_KEY, 1, timeout=None)
+    combination = {key: value for key, value in filters.items() if key != 'sort'}
+    digest = hashlib.md5(json.dumps(combination, sort_keys=True, default=str).encode()).hexdigest()
+    key = f'store:facets:{version}:{digest}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(filters)
+        cache.set(key, facets, timeout=settings.PRODUCT_FACETS_TTL)
+    return facets
+
+
+def bump_facets_version():
+    """Makes every cached facet combination stale; called on commit of catalog writes."""
+    try:
+        cache.incr(FACETS_VERSION_KEY)
+    except ValueError:
+        cache.set(FACETS_VERSION_KEY, 2, timeout=None)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from store.snapshots import build_home_snapshot
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the precomputed home page payload served by /api/store/home/.
+    Run it after deploys or from a scheduler; catalog changes also trigger a
+    background rebuild through store.signals.
+    """
+    help = 'Rebuilds the cached home page snapshot (latest, featured and top-rated products).'
+
+    def handle(self, *args, **options):
+        entry = build_home_snapshot()
+        payload = entry['payload']
+        self.stdout.write(self.style.SUCCESS(
+            f"Home snapshot built at {entry['built_at']}: "
+            f"{len(payload['latest_products'])} latest, "
+            f"{len(payload['featured_categories'])} categories, "
+            f"{len(payload['top_rated_products'])} top rated."
+        ))
@@ -0,0 +1,103 @@
+import time
+from collections import Counter
+from itertools import permutations
+
+from django.core.management.base import BaseCommand
+
+from store.models import CoPurchase, ProductSales
+from store.watermarks import add_window_arguments, process_order_line_windows, reset_watermark
+
+WATERMARK_NAME = 'recommendations'
+
+
+class Command(BaseCommand):
+    """
+    Django management command that maintains the related-products and
+    top-sellers tables from order history.
+
+    Only OrderProduct rows newer than the stored watermark are scanned, in the
+    id windows of store.watermarks. A window is read with a streaming
+    .iterator(), ordered by order so each basket is seen whole, and its
+    co-purchase / units-sold deltas are added to the compact CoPurchase and
+    ProductSales tables in the same transaction that advances the watermark.
+    A crash or an overlapping run therefore never counts a window twice, and
+    memory is bounded by the window size.
+    """
+    help = 'Incrementally builds co-purchase counts and per-category sales rankings from OrderProduct.'
+
+    def add_arguments(self, parser):
+        add_window_arguments(parser)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['rebuild']:
+            reset_watermark(WATERMARK_NAME, (CoPurchase, ProductSales))
+        processed, last_id = process_order_line_windows(
+            WATERMARK_NAME, lambda lines: self._apply_window(lines, options['chunk_size']),
+            window=options['window'], lag=options['lag'],
+        )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} order lines up to id {last_id} in {elapsed:.2f}s.'
+        ))
+
+    def _apply_window(self, queryset, chunk_size):
+        pairs = Counter()
+        units = Counter()
+        categories = {}
+        basket = set()
+        current_order = None
+        count = 0
+
+        rows = queryset.order_by('order_id', 'id').values_list(
+            'order_id', 'product_id', 'product__category_id', 'quantity'
+        ).iterator(chunk_size=chunk_size)
+        for order_id, product_id, category_id, quantity in rows:
+            if order_id != current_order:
+                pairs.update(permutations(basket, 2))
+                basket = set()
+                current_order = order_id
+            basket.add(product_id)
+            units[product_id] += quantity
+            categories[product_id] = category_id
+            count += 1
+        pairs.update(permutations(basket, 2))
+
+        self._add_co_purchases(pairs)
+        self._add_sales(units, categories)
+        return count
+
+    def _add_co_purchases(self, pairs):
+        if not pairs:
+            return
+        existing = {
+            (row.product_id, row.related_product_id): row
+            for row in CoPurchase.objects.filter(product_id__in={a for a, _ in pairs}, related_product_id__in={b for _, b in pairs})
+        }
+        to_update, to_create = [], []
+        for (product_id, related_id), delta in pairs.items():
+            row = existing.get((product_id, related_id))
+            if row is not None:
+                row.count += delta
+                to_update.append(row)
+            else:
+                to_create.append(CoPurchase(product_id=product_id, related_product_id=related_id, count=delta))
+        CoPurchase.objects.bulk_update(to_update, ['count'], batch_size=1000)
+        CoPurchase.objects.bulk_create(to_create, batch_size=1000)
+
+    def _add_sales(self, units, categories):
+        if not units:
+            return
+        existing = ProductSales.objects.in_bulk(list(units), field_name='product_id')
+        to_update, to_create = [], []
+        for product_id, delta in units.items():
+            row = existing.get(product_id)
+            if row is not None:
+                row.units_sold += delta
+                row.category_id = categories[product_id]
+                to_update.append(row)
+            else:
+                to_create.append(ProductSales(product_id=product_id, category_id=categories[product_id], units_sold=delta))
+        ProductSales.objects.bulk_update(to_update, ['units_sold', 'category'], batch_size=1000)
+        ProductSales.objects.bulk_create(to_create, batch_size=1000)
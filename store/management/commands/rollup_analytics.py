@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from store.analytics import flush
+from store.models import Product, ProductViewDaily, SearchTermDaily
+
+
+class Command(BaseCommand):
+    """
+    Django management command that rolls the daily analytics counters up.
+
+    1. Sets Product.popularity to the product's page views over the last
+       --days days (one grouped query), writing only the products whose
+       value changed, in bulk_update batches.
+    2. Deletes daily rows older than --keep-days.
+    3. Lists the most searched terms of the window.
+
+    Run it from a scheduler (e.g. hourly); the catalog's sort=popular reads
+    the stored value, so requests never aggregate the counters.
+    """
+    help = 'Updates Product.popularity from the daily view counters and prunes old counter rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ANALYTICS_POPULARITY_DAYS,
+                            help=f'Days of views counted in popularity (default: {settings.ANALYTICS_POPULARITY_DAYS}).')
+        parser.add_argument('--keep-days', type=int, default=400, help='Delete daily rows older than this (default: 400).')
+        parser.add_argument('--top', type=int, default=10, help='Search terms to list (default: 10).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Products per bulk_update (default: 1000).')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['keep_days'] < options['days']:
+            raise CommandError("--days must be positive and --keep-days at least --days.")
+        # Counters buffered by this process (none unless it recorded events itself)
+        flush()
+
+        today = timezone.localdate()
+        since = today - timedelta(days=options['days'] - 1)
+        views = dict(
+            ProductViewDaily.objects.filter(date__gte=since).values('product_id').annotate(
+                total=Sum('count')
+            ).values_list('product_id', 'total').order_by()
+        )
+
+        changed = []
+        for product_id, popularity in Product.objects.values_list('id', 'popularity').iterator(chunk_size=options['batch_size']):
+            value = views.get(product_id, 0)
+            if value != popularity:
+                changed.append(Product(id=product_id, popularity=value))
+        for start in range(0, len(changed), options['batch_size']):
+            with transaction.atomic():
+                Product.objects.bulk_update(changed[start:start + options['batch_size']], ['popularity'])
+
+        cutoff = today - timedelta(days=options['keep_days'])
+        pruned_views, _ = ProductViewDaily.objects.filter(date__lt=cutoff).delete()
+        pruned_searches, _ = SearchTermDaily.objects.filter(date__lt=cutoff).delete()
+
+        terms = SearchTermDaily.objects.filter(date__gte=since).values('term').annotate(
+            total=Sum('count')
+        ).order_by('-total', 'term')[:options['top']]
+        for row in terms:
+            self.stdout.write(f"{row['total']:8d}  {row['term']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Popularity over {options['days']} days: {len(views)} products viewed, {len(changed)} updated. "
+            f"Pruned {pruned_views + pruned_searches} rows older than {cutoff}."
+        ))
@@ -0,0 +1,152 @@
+import csv
+import json
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from store.filters import bump_facets_version
+from store.models import Product
+from store.snapshots import build_home_snapshot
+
+SYNC_FIELDS = ('stock', 'price', 'is_available')
+BOOLEANS = {'1': True, 'true': True, 'yes': True, '0': False, 'false': False, 'no': False}
+
+
+def _parse(record):
+    """(key field, key, {field: value}) for one input record; raises ValueError when a value is invalid."""
+    values = {}
+    raw = {field: str(record[field]).strip() for field in SYNC_FIELDS if record.get(field) not in (None, '')}
+    if 'stock' in raw:
+        values['stock'] = int(raw['stock'])
+        if values['stock'] < 0:
+            raise ValueError("stock cannot be negative")
+    if 'price' in raw:
+        try:
+            values['price'] = Decimal(raw['price']).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            raise ValueError(f"invalid price {raw['price']!r}")
+        if values['price'] < 0:
+            raise ValueError("price cannot be negative")
+    if 'is_available' in raw:
+        if raw['is_available'].lower() not in BOOLEANS:
+            raise ValueError(f"invalid is_available {raw['is_available']!r}")
+        values['is_available'] = BOOLEANS[raw['is_available'].lower()]
+
+    if record.get('id') not in (None, ''):
+        return 'id', int(record['id']), values
+    if record.get('slug'):
+        return 'slug', str(record['slug']).strip(), values
+    raise ValueError("row has neither id nor slug")
+
+
+class Command(BaseCommand):
+    """
+    Django management command that applies a supplier feed of stock, price and
+    availability to existing products.
+
+    The feed (CSV with a header row, or JSON Lines) is streamed in chunks of
+    --chunk-size rows. Each chunk is matched to products with one in_bulk()
+    per key type (id, slug), compared in memory, and only the rows whose values
+    differ are written with bulk_update in a short transaction of their own.
+    Columns missing from a row are left untouched.
+    """
+    help = 'Bulk-updates product stock, price and is_available from a CSV or JSONL feed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Feed file, or - for standard input.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Feed format (default: from the file extension, else csv).')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows compared and written per transaction (default: 2000).')
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without writing them.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        feed_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        try:
+            source = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+
+        self.totals = dict.fromkeys(('rows', 'changed', 'unchanged', 'missing', 'invalid'), 0)
+        self.changed_ids = []
+        started = time.perf_counter()
+        with source:
+            records = self._records(source, feed_format)
+            while chunk := list(islice(records, options['chunk_size'])):
+                self._sync_chunk(chunk, options['dry_run'])
+        elapsed = time.perf_counter() - started
+
+        if self.changed_ids and not options['dry_run']:
+            # bulk_update sends no signals. This process can only reach the web workers
+            # through the database and a shared cache (CACHE_URL): the stored home
+            # snapshot and the facets version. Their per-process availability rows (and,
+            # without a shared cache, the facets and home entries) expire within their TTLs.
+            bump_facets_version()
+            build_home_snapshot()
+
+        totals = self.totals
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Dry run: ' if options['dry_run'] else ''}{totals['rows']} rows in {elapsed:.2f}s "
+            f"({totals['rows'] / max(elapsed, 1e-6):.0f} rows/s): {totals['changed']} changed, "
+            f"{totals['unchanged']} unchanged, {totals['missing']} unknown products, {totals['invalid']} invalid."
+        ))
+
+    def _records(self, source, feed_format):
+        if feed_format == 'csv':
+            # Line numbers count the CSV header
+            lines = enumerate(csv.DictReader(source), start=2)
+        else:
+            lines = ((line_number, line) for line_number, line in enumerate(source, start=1) if line.strip())
+        for line_number, record in lines:
+            self.totals['rows'] += 1
+            try:
+                # JSON is decoded here, so a malformed line is skipped like any invalid row
+                yield _parse(record if feed_format == 'csv' else json.loads(record))
+            except (ValueError, TypeError, AttributeError) as exc:
+                self.totals['invalid'] += 1
+                self.stderr.write(f"Line {line_number}: {exc}; skipped.")
+
+    def _sync_chunk(self, chunk, dry_run):
+        keys = {'id': [], 'slug': []}
+        for key_field, key, _ in chunk:
+            keys[key_field].append(key)
+        products = Product.objects.only('id', 'slug', *SYNC_FIELDS)
+        found = {
+            key_field: products.in_bulk(values, field_name=key_field) if values else {}
+            for key_field, values in keys.items()
+        }
+
+        changed = {}
+        fields = set()
+        for key_field, key, values in chunk:
+            product = found[key_field].get(key)
+            if product is None:
+                self.totals['missing'] += 1
+                continue
+            product = changed.get(product.id, product)
+            diff = {field: value for field, value in values.items() if getattr(product, field) != value}
+            if not diff:
+                if product.id not in changed:
+                    self.totals['unchanged'] += 1
+                continue
+            for field, value in diff.items():
+                setattr(product, field, value)
+            fields.update(diff)
+            changed[product.id] = product
+
+        self.totals['changed'] += len(changed)
+        if not changed or dry_run:
+            return
+        now = timezone.now()
+        for product in changed.values():
+            product.modified_date = now
+        with transaction.atomic():
+            Product.objects.bulk_update(changed.values(), [*sorted(fields), 'modified_date'])
+        self.changed_ids.extend(changed)
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def backfill_rating_summaries(apps, schema_editor):
+    """
+    Builds the histogram of every product from its approved reviews, in one
+    pass over the review table; from here on store.signals keeps it current.
+    Half stars round up, like store.models.star_bucket.
+    """
+    ReviewRating = apps.get_model('store', 'ReviewRating')
+    ProductRatingSummary = apps.get_model('store', 'ProductRatingSummary')
+    summaries = {}
+    reviews = ReviewRating.objects.filter(status=True).values_list('product_id', 'rating')
+    for product_id, rating in reviews.iterator(chunk_size=2000):
+        summary = summaries.setdefault(product_id, ProductRatingSummary(product_id=product_id))
+        star = min(5, max(1, int(rating + 0.5)))
+        setattr(summary, f'stars_{star}', getattr(summary, f'stars_{star}') + 1)
+        summary.rating_count += 1
+        summary.rating_sum += rating
+    ProductRatingSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_product_rating_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rating_summaries, migrations.RunPython.noop),
+    ]
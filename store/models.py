@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
 from category.models import Category
 from accounts.models import Account
@@ -21,6 +21,20 @@ class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     created_date = models.DateTimeField(auto_now_add=True)
     modified_date = models.DateTimeField(auto_now=True)
+    # Approved review aggregates, kept up to date by store.signals
+    rating_average = models.FloatField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    # Recent product page views, set by the rollup_analytics command
+    popularity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Catalog filters and sorts (store/filters.py) always start from is_available=True
+        indexes = [
+            models.Index(fields=['is_available', 'price'], name='product_avail_price_idx'),
+            models.Index(fields=['is_available', '-created_date'], name='product_avail_newest_idx'),
+            models.Index(fields=['is_available', '-rating_average'], name='product_avail_rating_idx'),
+            models.Index(fields=['is_available', '-popularity'], name='product_avail_popular_idx'),
+        ]
 
     def get_url(self):
         return reverse('store:product_detail', args=[self.category.slug, self.slug])
@@ -57,9 +71,19 @@ class Variation(models.Model):
 
     objects = VariationManager()
 
+    class Meta:
+        # Color/size filter subqueries and facet counts
+        indexes = [
+            models.Index(fields=['variation_category', 'variation_value', 'product'], name='variation_value_idx'),
+        ]
+
     def __str__(self):
         return self.variation_value
     
+# Reviews shown on a product page and per page of its reviews API
+REVIEWS_PAGE_SIZE = 10
+
+
 class ReviewRating(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     user = models.ForeignKey(Account, on_delete=models.CASCADE)
@@ -70,9 +94,53 @@ class ReviewRating(models.Model):
     status = models.BooleanField(default=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    class Meta:
+        # Keyset pages of a product's reviews (/api/store/products/<id>/reviews/)
+        indexes = [
+            models.Index(fields=['product', 'status', '-created_at', '-id'], name='review_product_recent_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # store.signals locks and reads the stored row in pre_save; the lock must last until post_save
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def counted_rating(self):
+        """(product_id, rating) this review contributes to the rating summary, or None."""
+        return (self.product_id, self.rating) if self.status else None
+
     def __str__(self):
         return self.subject
+
+
+def star_bucket(rating):
+    """Histogram bucket (1-5) of a rating; half stars round up."""
+    return min(5, max(1, int(rating + 0.5)))
+
+
+class ProductRatingSummary(models.Model):
+    """
+    Approved-review histogram of a product, maintained incrementally by
+    store.signals on review save/delete so reading it never scans the reviews.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='rating_summary')
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Product rating summaries'
+
+    def histogram(self):
+        return {str(star): getattr(self, f'stars_{star}') for star in range(1, 6)}
+
+    def __str__(self):
+        return f"{self.product_id}: {self.rating_count} ratings"
     
 class ProductGallery(models.Model):
     product = models.ForeignKey(Product, default=None, on_delete=models.CASCADE)
@@ -83,4 +151,83 @@ class ProductGallery(models.Model):
         verbose_name_plural = 'Product Galleries'
 
     def __str__(self):
-        return self.product.product_name
\ No newline at end of file
+        return self.product.product_name
+
+class CatalogSnapshot(models.Model):
+    """Precomputed API payloads (e.g. the home page), rebuilt offline by store.snapshots."""
+    key = models.CharField(max_length=50, unique=True)
+    payload = models.JSONField(default=dict)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.key
+
+
+class Watermark(models.Model):
+    """High-water mark (last processed id) for incremental offline jobs."""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
+
+
+class CoPurchase(models.Model):
+    """How many orders contained both products; filled by build_recommendations."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='co_purchases')
+    related_product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('product', 'related_product')
+        indexes = [models.Index(fields=['product', '-count'], name='copurchase_product_rank_idx')]
+
+    def __str__(self):
+        return f"{self.product_id} + {self.related_product_id} ({self.count})"
+
+
+class ProductSales(models.Model):
+    """Units sold per product, ranked within its category; filled by build_recommendations."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='sales')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    units_sold = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Product sales'
+        indexes = [
+            models.Index(fields=['category', '-units_sold'], name='sales_category_rank_idx'),
+            models.Index(fields=['-units_sold'], name='sales_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.units_sold}"
+
+
+class ProductViewDaily(models.Model):
+    """Product page views per day, upserted in batches by store.analytics."""
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Product views (daily)'
+        # Also the conflict target of the upsert
+        unique_together = ('date', 'product')
+
+    def __str__(self):
+        return f"{self.date} {self.product_id}: {self.count}"
+
+
+class SearchTermDaily(models.Model):
+    """Normalized search keywords per day, upserted in batches by store.analytics."""
+    date = models.DateField()
+    term = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Search terms (daily)'
+        unique_together = ('date', 'term')
+
+    def __str__(self):
+        return f"{self.date} {self.term!r}: {self.count}"
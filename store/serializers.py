@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from category.models import Category
-from .models import Product, Variation, ProductGallery
+from .models import Product, Variation, ProductGallery, ReviewRating, ProductRatingSummary
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -37,11 +37,63 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
 
     def get_variations(self, obj):
-        # Utilizing the custom VariationManager methods from models.py
-        # obj.variation_set.all() must be prefetched in the viewset to prevent N+1 queries
-        colors = VariationSerializer(obj.variation_set.filter(variation_category='color', is_active=True), many=True).data
-        sizes = VariationSerializer(obj.variation_set.filter(variation_category='size', is_active=True), many=True).data
+        # obj.variation_set.all() must be prefetched in the viewset; grouping in Python
+        # keeps it at one query for the whole page (a .filter() here would query per product)
+        active = [variation for variation in obj.variation_set.all() if variation.is_active]
+        colors = VariationSerializer([v for v in active if v.variation_category == 'color'], many=True).data
+        sizes = VariationSerializer([v for v in active if v.variation_category == 'size'], many=True).data
         return {
             'colors': colors,
             'sizes': sizes
         }
+
+class ReviewSerializer(serializers.ModelSerializer):
+    user_name = serializers.CharField(source='user.full_name', read_only=True)
+
+    class Meta:
+        model = ReviewRating
+        fields = ['id', 'user_name', 'subject', 'review', 'rating', 'created_at']
+
+class ProductRatingSummarySerializer(serializers.ModelSerializer):
+    rating_average = serializers.SerializerMethodField()
+    histogram = serializers.DictField(read_only=True)
+
+    class Meta:
+        model = ProductRatingSummary
+        fields = ['rating_count', 'rating_average', 'histogram']
+
+    def get_rating_average(self, obj):
+        return round(obj.rating_sum / obj.rating_count, 2) if obj.rating_count else 0
+
+class ProductDetailSerializer(ProductSerializer):
+    """
+    Product page payload. Expects the reviews to be prefetched into
+    ``first_reviews`` and ``already_purchased`` in the serializer context.
+    """
+    reviews = ReviewSerializer(source='first_reviews', many=True, read_only=True)
+    already_purchased = serializers.SerializerMethodField()
+
+    class Meta(ProductSerializer.Meta):
+        fields = ProductSerializer.Meta.fields + ['rating_average', 'rating_count', 'reviews', 'already_purchased']
+
+    def get_already_purchased(self, obj):
+        return self.context.get('already_purchased', False)
+
+class ProductCardSerializer(serializers.ModelSerializer):
+    # Slim product card used by the home snapshot and the recommendation lists
+    category_name = serializers.CharField(source='category.category_name', read_only=True)
+    category_slug = serializers.CharField(source='category.slug', read_only=True)
+
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'product_name', 'slug', 'price', 'images', 'stock',
+            'category_name', 'category_slug', 'rating_average', 'rating_count'
+        ]
+
+
+class ProductAvailabilitySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    stock = serializers.IntegerField()
+    is_available = serializers.BooleanField()
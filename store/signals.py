@@ -0,0 +1,135 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, FloatField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+from django.dispatch import receiver
+
+from category.models import Category
+from . import autocomplete
+from .availability import invalidate_availability
+from .filters import bump_facets_version
+from .models import Product, ProductRatingSummary, ReviewRating, Variation, star_bucket
+from .snapshots import schedule_home_snapshot_refresh
+
+
+def _apply_rating(counted, sign):
+    """
+    Adds (sign=1) or removes (sign=-1) one counted (product_id, rating) from its
+    summary with F() deltas; the UPDATE locks the summary row until commit.
+    """
+    product_id, rating = counted
+    deltas = {f'stars_{star_bucket(rating)}': sign, 'rating_count': sign, 'rating_sum': sign * rating}
+    summaries = ProductRatingSummary.objects.filter(product_id=product_id)
+    if summaries.update(**{field: F(field) + delta for field, delta in deltas.items()}) or sign < 0:
+        return
+    try:
+        with transaction.atomic():
+            ProductRatingSummary.objects.create(product_id=product_id, **deltas)
+    except IntegrityError:
+        # Created concurrently since the update above
+        summaries.update(**{field: F(field) + delta for field, delta in deltas.items()})
+
+
+def _copy_rating_to_product(product_id):
+    # Product.rating_average/rating_count feed the catalog sorts and cards; derived from the summary in one UPDATE
+    summary = ProductRatingSummary.objects.filter(product_id=OuterRef('pk'))
+    average = summary.annotate(average=Case(
+        When(rating_count__gt=0, then=F('rating_sum') / F('rating_count')), default=Value(0.0), output_field=FloatField(),
+    ))
+    Product.objects.filter(pk=product_id).update(
+        rating_count=Coalesce(Subquery(summary.values('rating_count')), 0),
+        rating_average=Coalesce(Subquery(average.values('average')), 0.0),
+    )
+
+
+def _update_rating(old, new):
+    # Only runs on review writes that change what is counted, so no read ever aggregates the review table
+    if old == new:
+        return
+    changes = [(counted, sign) for counted, sign in ((old, -1), (new, 1)) if counted is not None]
+    # Summary rows are locked in product order, so two moves in opposite directions cannot deadlock
+    for counted, sign in sorted(changes, key=lambda change: change[0][0]):
+        _apply_rating(counted, sign)
+    for product_id in {counted[0] for counted, _ in changes}:
+        _copy_rating_to_product(product_id)
+    transaction.on_commit(schedule_home_snapshot_refresh)
+    # min_rating facet counts depend on the averages
+    transaction.on_commit(bump_facets_version)
+
+
+def _stored_rating(instance):
+    """
+    What the summary counts for the stored row of ``instance``, read under a row
+    lock: a stale instance never supplies the old value, and a concurrent write
+    of the same review waits for this one to commit.
+    """
+    if instance.pk is None:
+        return None
+    row = ReviewRating.objects.select_for_update().filter(pk=instance.pk).values_list(
+        'product_id', 'rating', 'status'
+    ).first()
+    return (row[0], row[1]) if row is not None and row[2] else None
+
+
+@receiver(pre_save, sender=ReviewRating)
+@receiver(pre_delete, sender=ReviewRating)
+def read_stored_rating(sender, instance, **kwargs):
+    # ReviewRating.save() and deletions run in a transaction, so the lock lasts until the post_ signal
+    instance._stored_rating = _stored_rating(instance)
+
+
+@receiver(post_save, sender=ReviewRating)
+def update_rating_on_save(sender, instance, **kwargs):
+    _update_rating(instance._stored_rating, instance.counted_rating())
+
+
+@receiver(post_delete, sender=ReviewRating)
+def update_rating_on_delete(sender, instance, **kwargs):
+    _update_rating(instance._stored_rating, None)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def refresh_catalog_snapshots(sender, **kwargs):
+    transaction.on_commit(schedule_home_snapshot_refresh)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_availability(sender, instance, **kwargs):
+    product_id = instance.pk
+    transaction.on_commit(lambda: invalidate_availability([product_id]))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Variation)
+@receiver(post_delete, sender=Variation)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_facets(sender, **kwargs):
+    transaction.on_commit(bump_facets_version)
+
+
+@receiver(post_save, sender=Product)
+def update_autocomplete_product(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocomplete.update_product(instance))
+
+
+@receiver(post_delete, sender=Product)
+def remove_autocomplete_product(sender, instance, **kwargs):
+    product_id = instance.pk
+    transaction.on_commit(lambda: autocomplete.remove_product(product_id))
+
+
+@receiver(post_save, sender=Category)
+def update_autocomplete_category(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocomplete.update_category(instance))
+
+
+@receiver(post_delete, sender=Category)
+def remove_autocomplete_category(sender, instance, **kwargs):
+    category_id = instance.pk
+    transaction.on_commit(lambda: autocomplete.remove_category(category_id))
@@ -0,0 +1,84 @@
+"""
+Precomputed catalog payloads.
+
+The home page payload is built offline (``build_home_snapshot`` management
+command or a background refresh after catalog changes), persisted in
+CatalogSnapshot and served from the cache. Requests never build it inline: a
+stale snapshot is served while a background thread rebuilds it
+(stale-while-revalidate), and a cold cache falls back to the stored row.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from category.models import Category
+from .models import Product, CatalogSnapshot
+from .serializers import CategorySerializer, ProductCardSerializer
+
+logger = logging.getLogger(__name__)
+
+HOME_SNAPSHOT_KEY = 'home'
+HOME_CACHE_KEY = 'store:snapshot:home'
+HOME_REFRESH_LOCK_KEY = 'store:snapshot:home:refreshing'
+
+
+def build_home_snapshot():
+    products = Product.objects.filter(is_available=True).select_related('category')
+    payload = {
+        'latest_products': ProductCardSerializer(products.order_by('-created_date')[:12], many=True).data,
+        'featured_categories': CategorySerializer(Category.objects.order_by('id')[:4], many=True).data,
+        'top_rated_products': ProductCardSerializer(
+            products.filter(rating_count__gt=0).order_by('-rating_average', '-rating_count')[:8], many=True
+        ).data,
+    }
+    snapshot, _ = CatalogSnapshot.objects.update_or_create(key=HOME_SNAPSHOT_KEY, defaults={'payload': payload})
+    entry = {'payload': payload, 'built_at': snapshot.built_at.isoformat(), 'fresh_until': time.time() + settings.HOME_SNAPSHOT_MAX_AGE}
+    cache.set(HOME_CACHE_KEY, entry, timeout=None)
+    return entry
+
+
+def _refresh_home_snapshot():
+    try:
+        build_home_snapshot()
+    except Exception:
+        logger.exception("Home snapshot refresh failed")
+    finally:
+        cache.delete(HOME_REFRESH_LOCK_KEY)
+        if settings.HOME_SNAPSHOT_BACKGROUND_REFRESH:
+            connection.close()
+
+
+def schedule_home_snapshot_refresh():
+    # The lock keeps a burst of catalog saves down to a single rebuild
+    if not cache.add(HOME_REFRESH_LOCK_KEY, True, timeout=60):
+        return
+    if settings.HOME_SNAPSHOT_BACKGROUND_REFRESH:
+        threading.Thread(target=_refresh_home_snapshot, daemon=True).start()
+    else:
+        _refresh_home_snapshot()
+
+
+def get_home_snapshot():
+    """
+    Returns the cached entry ({'payload', 'built_at', 'fresh_until'}) or None
+    when nothing has been built yet. Stale or missing entries trigger a refresh.
+    """
+    entry = cache.get(HOME_CACHE_KEY)
+    if entry is None:
+        row = CatalogSnapshot.objects.filter(key=HOME_SNAPSHOT_KEY).values('payload', 'built_at').first()
+        if row:
+            entry = {
+                'payload': row['payload'],
+                'built_at': row['built_at'].isoformat(),
+                'fresh_until': row['built_at'].timestamp() + settings.HOME_SNAPSHOT_MAX_AGE,
+            }
+            cache.set(HOME_CACHE_KEY, entry, timeout=None)
+    if entry is None or entry['fresh_until'] < time.time():
+        schedule_home_snapshot_refresh()
+        # Only the synchronous (test) mode has a new entry at this point
+        entry = cache.get(HOME_CACHE_KEY, entry)
+    return entry
@@ -1,3 +1,674 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connections
+from django.test import RequestFactory, TestCase, TransactionTestCase, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from category.models import Category
+from familyplus.db_router import PrimaryReplicaRouter, use_read_replica, routing_scope, pin_to_primary
+from rest_framework.test import APIClient
+
+from accounts.models import Account
+from carts.models import CartItem
+from orders.models import Order, OrderProduct
+from . import analytics, autocomplete, views_legacy
+from .availability import invalidate_availability
+from .filters import bump_facets_version
+from .models import Product, Variation, ReviewRating, CoPurchase, ProductSales, ProductViewDaily, SearchTermDaily
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_stay_on_primary_outside_replica_block(self):
+        with routing_scope():
+            self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    def test_reads_go_to_a_replica_inside_replica_block(self):
+        with routing_scope(), use_read_replica():
+            self.assertIn(self.router.db_for_read(Product), ['replica1', 'replica2'])
+
+    def test_write_pins_rest_of_request_to_primary(self):
+        with routing_scope(), use_read_replica():
+            self.assertEqual(self.router.db_for_write(Product), 'default')
+            self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    def test_write_outside_request_scope_does_not_pin(self):
+        self.router.db_for_write(Product)
+        with use_read_replica():
+            self.assertIn(self.router.db_for_read(Product), ['replica1', 'replica2'])
+
+    def test_pinned_client_reads_from_primary(self):
+        with routing_scope(), use_read_replica():
+            pin_to_primary()
+            self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_falls_back_to_primary_without_replicas(self):
+        with routing_scope(), use_read_replica():
+            self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    def test_never_migrates_replicas(self):
+        self.assertFalse(self.router.allow_migrate('replica1', 'store'))
+        self.assertIsNone(self.router.allow_migrate('default', 'store'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], HOME_SNAPSHOT_BACKGROUND_REFRESH=False)
+class ReplicaCatalogTests(TransactionTestCase):
+    # The replica alias mirrors the test database, so no transaction wrapping here
+    databases = '__all__'
+
+    def setUp(self):
+        Category.objects.create(category_name='Toys', slug='toys')
+
+    def test_catalog_reads_are_served_by_replica(self):
+        with CaptureQueriesContext(connections['replica1']) as replica_queries:
+            response = self.client.get('/api/store/categories/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(replica_queries.captured_queries)
+
+    def test_cart_write_pins_client_to_primary(self):
+        headers = {'HTTP_X_CART_ID': 'pinned-cart'}
+        product = Product.objects.create(
+            product_name='Ball', slug='ball', price=10, stock=5,
+            category=Category.objects.get(slug='toys'),
+        )
+        self.client.post(f'/api/cart/add/{product.id}/', **headers)
+        with CaptureQueriesContext(connections['replica1']) as replica_queries:
+            self.client.get('/api/store/categories/', **headers)
+        self.assertFalse(replica_queries.captured_queries)
+
+
+@override_settings(HOME_SNAPSHOT_BACKGROUND_REFRESH=False)
+class HomeSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(category_name='Toys', slug='toys')
+        self.product = Product.objects.create(
+            product_name='Ball', slug='ball', price=10, stock=5, category=self.category,
+        )
+        self.user = Account.objects.create_user('Asha', 'Nair', 'asha', 'asha@example.com', 'secret-pass-123')
+
+    def test_review_writes_maintain_stored_rating_aggregates(self):
+        ReviewRating.objects.create(product=self.product, user=self.user, rating=4)
+        review = ReviewRating.objects.create(product=self.product, user=self.user, rating=2)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_average, self.product.rating_count), (3, 2))
+        review.status = False
+        review.save()
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_average, self.product.rating_count), (4, 1))
+
+    def test_home_is_served_from_snapshot_without_queries(self):
+        ReviewRating.objects.create(product=self.product, user=self.user, rating=5)
+        call_command('build_home_snapshot', stdout=StringIO())
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/store/home/')
+        data = response.json()
+        self.assertEqual([p['slug'] for p in data['latest_products']], ['ball'])
+        self.assertEqual([p['slug'] for p in data['top_rated_products']], ['ball'])
+        self.assertEqual([c['slug'] for c in data['featured_categories']], ['toys'])
+        self.assertIn('max-age=60', response['Cache-Control'])
+
+    def test_cold_cache_falls_back_to_stored_snapshot(self):
+        call_command('build_home_snapshot', stdout=StringIO())
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/store/home/')
+        self.assertEqual(len(response.json()['latest_products']), 1)
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.user = Account.objects.create_user('Asha', 'Nair', 'asha', 'asha@example.com', 'secret-pass-123')
+        toys = Category.objects.create(category_name='Toys', slug='toys')
+        books = Category.objects.create(category_name='Books', slug='books')
+        self.ball = Product.objects.create(product_name='Ball', slug='ball', price=10, stock=50, category=toys)
+        self.kite = Product.objects.create(product_name='Kite', slug='kite', price=20, stock=50, category=toys)
+        self.atlas = Product.objects.create(product_name='Atlas', slug='atlas', price=30, stock=50, category=books)
+
+    def _order(self, *lines):
+        order = Order.objects.create(
+            user=self.user, first_name='Asha', last_name='Nair', phone='9999999999', email='asha@example.com',
+            address_line_1='1 Main St', country='IN', state='KL', city='Kochi', order_total=0, shipping=40,
+        )
+        for product, quantity in lines:
+            OrderProduct.objects.create(
+                order=order, user=self.user, product=product, quantity=quantity,
+                product_price=float(product.price), ordered=True,
+            )
+
+    def _build(self, **options):
+        call_command('build_recommendations', lag=0, window=2, chunk_size=1, stdout=StringIO(), **options)
+
+    def test_incremental_build_counts_each_line_once(self):
+        self._order((self.ball, 1), (self.kite, 2))
+        self._order((self.ball, 3), (self.atlas, 1))
+        self._build()
+        self._order((self.ball, 1), (self.kite, 1))
+        self._build()
+        self._build()
+
+        self.assertEqual(CoPurchase.objects.get(product=self.ball, related_product=self.kite).count, 2)
+        self.assertEqual(CoPurchase.objects.get(product=self.atlas, related_product=self.ball).count, 1)
+        self.assertEqual(ProductSales.objects.get(product=self.ball).units_sold, 5)
+
+        self._build(rebuild=True)
+        self.assertEqual(ProductSales.objects.get(product=self.ball).units_sold, 5)
+
+    def test_related_and_top_seller_endpoints(self):
+        self._order((self.ball, 1), (self.kite, 3))
+        self._order((self.ball, 3), (self.kite, 1), (self.atlas, 1))
+        self._order((self.ball, 1), (self.atlas, 1))
+        self._order((self.ball, 1), (self.atlas, 1))
+        self._build()
+
+        related = self.client.get(f'/api/store/products/{self.ball.id}/related/').json()
+        self.assertEqual([p['slug'] for p in related], ['atlas', 'kite'])
+
+        top = self.client.get('/api/store/top-sellers/').json()
+        self.assertEqual([p['slug'] for p in top], ['ball', 'kite', 'atlas'])
+        top_toys = self.client.get('/api/store/top-sellers/?category=toys&limit=1').json()
+        self.assertEqual([p['slug'] for p in top_toys], ['ball'])
+
+
+class ProductExportTests(TestCase):
+    def test_admin_action_streams_selected_products_with_variations(self):
+        admin_user = Account.objects.create_superuser('Root', 'Admin', 'root@example.com', 'root', 'secret-pass-123')
+        toys = Category.objects.create(category_name='Toys', slug='toys')
+        ball = Product.objects.create(product_name='Ball', slug='ball', price=10, stock=5, category=toys)
+        Product.objects.create(product_name='Kite', slug='kite', price=20, stock=5, category=toys)
+        Variation.objects.create(product=ball, variation_category='color', variation_value='red')
+        Variation.objects.create(product=ball, variation_category='size', variation_value='S')
+        self.client.force_login(admin_user)
+
+        response = self.client.post('/admin/store/product/', {'action': 'export_jsonl', '_selected_action': [ball.pk]})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows, [dict(rows[0], id=ball.pk, product_name='Ball', category='Toys', price='10.00', variations='color: red; size: S')])
+
+
+@override_settings(HOME_SNAPSHOT_BACKGROUND_REFRESH=False)
+class ProductAvailabilityTests(TestCase):
+    def setUp(self):
+        invalidate_availability()
+        self.addCleanup(invalidate_availability)
+        toys = Category.objects.create(category_name='Toys', slug='toys')
+        self.products = [
+            Product.objects.create(product_name=f'Toy {n}', slug=f'toy-{n}', price=10 * n, stock=n, category=toys)
+            for n in range(1, 4)
+        ]
+        self.ids = ','.join(str(product.id) for product in self.products)
+
+    def test_one_query_then_served_from_process_cache(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/store/products/availability/?ids={self.ids},999')
+        self.assertEqual(response.json(), [
+            {'id': product.id, 'price': f'{product.price}.00', 'stock': product.stock, 'is_available': True}
+            for product in self.products
+        ])
+        self.assertIn('max-age=', response['Cache-Control'])
+        with self.assertNumQueries(0):
+            self.client.get(f'/api/store/products/availability/?ids={self.ids},999')
+
+    def test_product_save_invalidates_on_commit(self):
+        self.client.get(f'/api/store/products/availability/?ids={self.ids}')
+        product = self.products[0]
+        product.stock = 0
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        response = self.client.get(f'/api/store/products/availability/?ids={product.id}')
+        self.assertEqual(response.json()[0]['stock'], 0)
+
+    def test_rejects_bad_or_too_many_ids(self):
+        self.assertEqual(self.client.get('/api/store/products/availability/?ids=1,x').status_code, 400)
+        ids = ','.join(str(n) for n in range(1, 202))
+        self.assertEqual(self.client.get(f'/api/store/products/availability/?ids={ids}').status_code, 400)
+
+
+@override_settings(HOME_SNAPSHOT_BACKGROUND_REFRESH=False)
+class ProductBySlugTests(TestCase):
+    def setUp(self):
+        # Page views are only buffered here; never flush them inside a query count
+        analytics.discard()
+        self.addCleanup(analytics.discard)
+        self.user = Account.objects.create_user('Asha', 'Nair', 'asha', 'asha@example.com', 'secret-pass-123')
+        toys = Category.objects.create(category_name='Toys', slug='toys')
+        self.kite = Product.objects.create(product_name='Kite', slug='kite', price=20, stock=5, category=toys)
+        for value in ('red', 'blue'):
+            Variation.objects.create(product=self.kite, variation_category='color', variation_value=value)
+        Variation.objects.create(product=self.kite, variation_category='size', variation_value='XL', is_active=False)
+        for n in range(12):
+            reviewer = Account.objects.create_user('Reviewer', str(n), f'reviewer{n}', f'r{n}@example.com', 'secret-pass-123')
+            ReviewRating.objects.create(product=self.kite, user=reviewer, subject=f'Review {n}', rating=4)
+
+    def test_detail_in_fixed_queries(self):
+        # product with category, gallery, variations, reviews with users
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/store/products/by-slug/toys/kite/')
+        data = response.json()
+        self.assertEqual(data['id'], self.kite.id)
+        self.assertEqual([v['variation_value'] for v in data['variations']['colors']], ['red', 'blue'])
+        self.assertEqual(data['variations']['sizes'], [])
+        self.assertEqual(len(data['reviews']), 10)
+        self.assertEqual(data['reviews'][0]['subject'], 'Review 11')
+        self.assertEqual(data['reviews'][0]['user_name'], 'Reviewer 11')
+        self.assertFalse(data['already_purchased'])
+
+        self.assertEqual(self.client.get('/api/store/products/by-slug/kite/').json()['id'], self.kite.id)
+        self.assertEqual(self.client.get('/api/store/products/by-slug/books/kite/').status_code, 404)
+
+    def test_already_purchased_for_buyers(self):
+        order = Order.objects.create(
+            user=self.user, first_name='Asha', last_name='Nair', phone='9999999999', email='asha@example.com',
+            address_line_1='1 Main St', country='IN', state='KL', city='Kochi', order_total=60, shipping=40,
+        )
+        OrderProduct.objects.create(order=order, user=self.user, product=self.kite, quantity=1, product_price=20, ordered=True)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.assertNumQueries(5):
+            response = client.get('/api/store/products/by-slug/toys/kite/')
+        self.assertTrue(response.json()['already_purchased'])
+
+
+class LegacyProductDetailTests(TestCase):
+    def setUp(self):
+        analytics.discard()
+        self.addCleanup(analytics.discard)
+        toys = Category.objects.create(category_name='Toys', slug='toys')
+        self.kite = Product.objects.create(product_name='Kite', slug='kite', price=20, stock=5, category=toys)
+
+    def test_visitor_without_session_never_sees_other_users_cart(self):
+        user = Account.objects.create_user('Asha', 'Nair', 'asha', 'asha@example.com', 'secret-pass-123')
+        CartItem.objects.create(user=user, product=self.kite, quantity=1)
+        request = RequestFactory().get('/store/toys/kite/')
+        SessionMiddleware(lambda request: None).process_request(request)
+        request.user = AnonymousUser()
+        with mock.patch('store.views_legacy.render') as render:
+            views_legacy.product_detail(request, 'toys', 'kite')
+        self.assertIs(render.call_args.args[2]['in_cart'], False)
+        self.assertIsNone(request.session.session_key)
+
+
+@override_settings(HOME_SNAPSHOT_BACKGROUND_REFRESH=False)
+class CatalogPaginationTests(TestCase):
+    def setUp(self):
+        toys = Category.objects.create(category_name='Toys', slug='toys')
+        Product.objects.bulk_create([
+            Product(product_name=f'Toy {n}', slug=f'toy-{n}', price=10, stock=1, category=toys)
+            for n in range(30)
+        ])
+
+    def test_products_are_paginated_by_default(self):
+        response = self.client.get('/api/store/products/').json()
+        self.assertEqual(response['count'], 30)
+        self.assertEqual(len(response['results']), 24)
+        self.assertIn('page=2', response['next'])
+        second = self.client.get('/api/store/products/?page=2').json()
+        self.assertEqual(len(second['results']), 6)
+        self.assertIsNone(second['next'])
+
+    def test_page_size_override_is_capped(self):
+        response = self.client.get('/api/store/products/?page_size=5').json()
+        self.assertEqual(len(response['results']), 5)
+        with mock.patch('familyplus.pagination.ProductPagination.max_page_size', 10):
+            response = self.client.get('/api/store/products/?page_size=1000').json()
+        self.assertEqual(len(response['results']), 10)
+
+    def test_categories_are_paginated(self):
+        response = self.client.get('/api/store/categories/').json()
+        self.assertEqual(response['count'], 1)
+        self.assertEqual(response['results'][0]['slug'], 'toys')
+
+
+@override_settings(HOME_SNAPSHOT_BACKGROUND_REFRESH=False)
+class CatalogFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        toys = Category.objects.create(category_name='Toys', slug='toys')
+        books = Category.objects.create(category_name='Books', slug='books')
+        self.kite = Product.objects.create(
+            product_name='Kite', slug='kite', price=20, stock=3, category=toys, rating_average=4.5, rating_count=2,
+        )
+        self.ball = Product.objects.create(product_name='Ball', slug='ball', price=60, stock=0, category=toys)
+        self.atlas = Product.objects.create(
+            product_name='Atlas', slug='atlas', price=120, stock=5, category=books, rating_average=3, rating_count=1,
+        )
+        Variation.objects.bulk_create([
+            Variation(product=self.kite, variation_category='color', variation_value='red'),
+            Variation(product=self.kite, variation_category='color', variation_value='blue'),
+            Variation(product=self.kite, variation_category='size', variation_value='M'),
+            Variation(product=self.ball, variation_category='color', variation_value='red'),
+        ])
+
+    def _slugs(self, query):
+        response = self.client.get(f'/api/store/products/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [product['slug'] for product in response.json()['results']]
+
+    def test_filters(self):
+        self.assertEqual(self._slugs('category_slug=toys'), ['kite', 'ball'])
+        self.assertEqual(self._slugs('min_price=50&max_price=100'), ['ball'])
+        self.assertEqual(self._slugs('in_stock=true'), ['kite', 'atlas'])
+        self.assertEqual(self._slugs('color=red,blue'), ['kite', 'ball'])
+        self.assertEqual(self._slugs('color=red&size=M'), ['kite'])
+        self.assertEqual(self._slugs('min_rating=4'), ['kite'])
+
+    def test_sorts(self):
+        self.assertEqual(self._slugs('sort=-price'), ['atlas', 'ball', 'kite'])
+        self.assertEqual(self._slugs('sort=rating'), ['kite', 'atlas', 'ball'])
+        self.assertEqual(self._slugs('sort=newest'), ['atlas', 'ball', 'kite'])
+
+    def test_invalid_parameters_are_rejected(self):
+        for query in ('min_price=abc', 'min_price=10&max_price=5', 'in_stock=maybe', 'min_rating=9', 'sort=name'):
+            self.assertEqual(self.client.get(f'/api/store/products/?{query}').status_code, 400, query)
+        self.assertEqual(self.client.get('/api/store/products/facets/?sort=name').status_code, 400)
+
+    def test_facets_in_one_query_and_cached(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/store/products/facets/?category_slug=toys')
+        self.assertEqual(response.json(), {
+            'category': [{'value': 'toys', 'count': 2}],
+            'color': [{'value': 'red', 'count': 2}, {'value': 'blue', 'count': 1}],
+            'size': [{'value': 'M', 'count': 1}],
+            'price': [{'value': '0-25', 'count': 1}, {'value': '50-100', 'count': 1}],
+        })
+        with self.assertNumQueries(0):
+            self.client.get('/api/store/products/facets/?category_slug=toys&sort=price')
+
+    def test_catalog_write_invalidates_facets(self):
+        self.client.get('/api/store/products/facets/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Variation.objects.create(product=self.atlas, variation_category='color', variation_value='red')
+        colors = self.client.get('/api/store/products/facets/').json()['color']
+        self.assertEqual(colors[0], {'value': 'red', 'count': 3})
+
+    def test_version_bumped_through_another_cache_client_is_seen(self):
+        # A file cache stands in for Redis: each client only shares what is stored
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+        }):
+            self.client.get('/api/store/products/facets/')
+            # Another process, e.g. sync_inventory or a second worker
+            with mock.patch('store.filters.cache', caches.create_connection('default')):
+                bump_facets_version()
+            with self.assertNumQueries(1):
+                self.client.get('/api/store/products/facets/')
+
+
+@override_settings(HOME_SNAPSHOT_BACKGROUND_REFRESH=False)
+class SyncInventoryTests(TestCase):
+    def setUp(self):
+        toys = Category.objects.create(category_name='Toys', slug='toys')
+        self.kite = Product.objects.create(product_name='Kite', slug='kite', price=20, stock=3, category=toys)
+        self.ball = Product.objects.create(product_name='Ball', slug='ball', price=10, stock=5, category=toys)
+        self.drum = Product.objects.create(product_name='Drum', slug='drum', price=30, stock=1, category=toys)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def _feed(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as feed:
+            feed.write(content)
+        return path
+
+    def _sync(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('sync_inventory', path, chunk_size=2, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_only_changed_rows_are_written(self):
+        path = self._feed('feed.csv', (
+            'id,slug,stock,price,is_available\n'
+            f'{self.kite.id},,3,20.00,true\n'
+            ',ball,0,12.5,false\n'
+            f'{self.drum.id},,1,,\n'
+            ',missing,4,1,true\n'
+            ',ball,x,1,true\n'
+        ))
+        kite_modified = self.kite.modified_date
+        output, errors = self._sync(path)
+
+        self.assertIn('5 rows', output)
+        self.assertIn('1 changed, 2 unchanged, 1 unknown products, 1 invalid', output)
+        self.assertIn('Line 6', errors)
+        self.ball.refresh_from_db()
+        self.assertEqual((self.ball.stock, self.ball.price, self.ball.is_available), (0, Decimal('12.50'), False))
+        self.kite.refresh_from_db()
+        self.assertEqual(self.kite.modified_date, kite_modified)
+
+    def test_malformed_jsonl_line_is_counted_and_skipped(self):
+        path = self._feed('feed.jsonl', '\n'.join([
+            json.dumps({'slug': 'kite', 'stock': 7}),
+            '{"slug": "ball", "stock": ',
+            json.dumps({'slug': 'drum', 'stock': 4}),
+        ]) + '\n')
+        output, errors = self._sync(path)
+
+        self.assertIn('3 rows', output)
+        self.assertIn('2 changed, 0 unchanged, 0 unknown products, 1 invalid', output)
+        self.assertIn('Line 2', errors)
+        self.assertEqual(
+            dict(Product.objects.values_list('slug', 'stock')), {'kite': 7, 'ball': 5, 'drum': 4},
+        )
+
+    def test_jsonl_dry_run_writes_nothing(self):
+        path = self._feed('feed.jsonl', json.dumps({'slug': 'drum', 'stock': 9}) + '\n')
+        output, _ = self._sync(path, dry_run=True)
+        self.assertIn('Dry run: 1 rows', output)
+        self.assertIn('1 changed', output)
+        self.drum.refresh_from_db()
+        self.assertEqual(self.drum.stock, 1)
+
+
+@override_settings(HOME_SNAPSHOT_BACKGROUND_REFRESH=False)
+class ProductReviewsTests(TestCase):
+    def setUp(self):
+        self.user = Account.objects.create_user('Asha', 'Nair', 'asha', 'asha@example.com', 'secret-pass-123')
+        toys = Category.objects.create(category_name='Toys', slug='toys')
+        self.kite = Product.objects.create(product_name='Kite', slug='kite', price=20, stock=3, category=toys)
+        self.url = f'/api/store/products/{self.kite.id}/reviews/'
+
+    def _review(self, rating, **fields):
+        return ReviewRating.objects.create(product=self.kite, user=self.user, rating=rating, **fields)
+
+    def _summary(self):
+        return self.client.get(self.url).json()['summary']
+
+    def test_histogram_follows_saves_status_changes_and_deletes(self):
+        self._review(5)
+        self._review(4.5)
+        review = self._review(2)
+        self.assertEqual(self._summary(), {
+            'rating_count': 3, 'rating_average': 3.83, 'histogram': {'1': 0, '2': 1, '3': 0, '4': 0, '5': 2},
+        })
+
+        review = ReviewRating.objects.get(pk=review.pk)
+        review.rating = 3
+        review.save()
+        self.assertEqual(self._summary()['histogram'], {'1': 0, '2': 0, '3': 1, '4': 0, '5': 2})
+
+        review.status = False
+        review.save()
+        self.assertEqual(self._summary()['rating_count'], 2)
+        review.subject = 'Edited while hidden'
+        review.save()
+        self.assertEqual(self._summary()['rating_count'], 2)
+
+        ReviewRating.objects.filter(rating=5).delete()
+        self.assertEqual(self._summary(), {
+            'rating_count': 1, 'rating_average': 4.5, 'histogram': {'1': 0, '2': 0, '3': 0, '4': 0, '5': 1},
+        })
+        self.kite.refresh_from_db()
+        self.assertEqual((self.kite.rating_average, self.kite.rating_count), (4.5, 1))
+
+    def test_stale_instances_toggling_status_are_counted_once(self):
+        review = self._review(4)
+        first, second = ReviewRating.objects.get(pk=review.pk), ReviewRating.objects.get(pk=review.pk)
+        first.status = False
+        first.save()
+        second.status = False
+        second.save()
+        self.assertEqual(self._summary()['rating_count'], 0)
+        # Loaded while approved, so saving it approves the review again
+        first.status = True
+        first.save()
+        second.delete()
+        first.delete()
+        self.assertEqual(self._summary(), {
+            'rating_count': 0, 'rating_average': 0, 'histogram': {str(star): 0 for star in range(1, 6)},
+        })
+
+    def test_stale_instances_moving_a_review_update_both_products(self):
+        drum = Product.objects.create(product_name='Drum', slug='drum', price=30, stock=1, category=self.kite.category)
+        review = self._review(2)
+        first, second = ReviewRating.objects.get(pk=review.pk), ReviewRating.objects.get(pk=review.pk)
+        first.product = drum
+        first.save()
+        # Stale: still on the kite, so saving it moves the review back
+        second.rating = 5
+        second.save()
+
+        self.assertEqual(self._summary()['histogram'], {'1': 0, '2': 0, '3': 0, '4': 0, '5': 1})
+        drum_summary = self.client.get(f'/api/store/products/{drum.id}/reviews/').json()['summary']
+        self.assertEqual(drum_summary['rating_count'], 0)
+        drum.refresh_from_db()
+        self.assertEqual(drum.rating_count, 0)
+
+    def test_keyset_pages_in_two_queries(self):
+        for n in range(5):
+            self._review(4, subject=f'Review {n}')
+        subjects = []
+        url = f'{self.url}?page_size=2'
+        while url:
+            with self.assertNumQueries(2):
+                page = self.client.get(url).json()
+            subjects += [review['subject'] for review in page['results']]
+            url = page['next']
+        self.assertEqual(subjects, [f'Review {n}' for n in reversed(range(5))])
+
+    def test_product_without_reviews(self):
+        self.assertEqual(self._summary(), {
+            'rating_count': 0, 'rating_average': 0, 'histogram': {str(star): 0 for star in range(1, 6)},
+        })
+        self.assertEqual(self.client.get('/api/store/products/999/reviews/').status_code, 404)
+
+
+@override_settings(HOME_SNAPSHOT_BACKGROUND_REFRESH=False, ANALYTICS_FLUSH_EVENTS=1000, ANALYTICS_FLUSH_INTERVAL=3600)
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        analytics.discard()
+        self.addCleanup(analytics.discard)
+        toys = Category.objects.create(category_name='Toys', slug='toys')
+        self.kite = Product.objects.create(product_name='Kite', slug='kite', price=20, stock=5, category=toys)
+        self.ball = Product.objects.create(product_name='Ball', slug='ball', price=10, stock=5, category=toys)
+
+    def test_views_are_buffered_then_upserted_as_deltas(self):
+        for _ in range(3):
+            self.client.get('/api/store/products/by-slug/kite/')
+        self.assertFalse(ProductViewDaily.objects.exists())
+
+        analytics.record_search('  Red   KITE ')
+        analytics.record_search('red kite')
+        with CaptureQueriesContext(connections['default']) as queries:
+            analytics.flush()
+        # One upsert per counter table
+        self.assertEqual(sum(query['sql'].startswith('INSERT') for query in queries.captured_queries), 2)
+        analytics.record_product_view(self.kite.id)
+        analytics.flush()
+
+        self.assertEqual(ProductViewDaily.objects.get(product=self.kite).count, 4)
+        self.assertEqual(list(SearchTermDaily.objects.values_list('term', 'count')), [('red kite', 2)])
+
+    @override_settings(ANALYTICS_FLUSH_EVENTS=3)
+    def test_flushes_after_n_events(self):
+        analytics.record_product_view(self.kite.id)
+        analytics.record_product_view(self.ball.id)
+        self.assertFalse(ProductViewDaily.objects.exists())
+        analytics.record_product_view(self.kite.id)
+        self.assertEqual(ProductViewDaily.objects.get(product=self.kite).count, 2)
+
+    def test_rollup_sets_popularity_and_prunes_old_rows(self):
+        today = timezone.localdate()
+        ProductViewDaily.objects.bulk_create([
+            ProductViewDaily(date=today, product=self.ball, count=7),
+            ProductViewDaily(date=today - timedelta(days=3), product=self.kite, count=2),
+            ProductViewDaily(date=today - timedelta(days=500), product=self.kite, count=50),
+        ])
+        SearchTermDaily.objects.create(date=today, term='kite', count=3)
+        stdout = StringIO()
+        call_command('rollup_analytics', stdout=stdout)
+
+        self.assertIn('kite', stdout.getvalue())
+        self.assertEqual(ProductViewDaily.objects.count(), 2)
+        response = self.client.get('/api/store/products/?sort=popular').json()
+        self.assertEqual([product['slug'] for product in response['results']], ['ball', 'kite'])
+        self.kite.refresh_from_db()
+        self.assertEqual(self.kite.popularity, 2)
+
+
+@override_settings(HOME_SNAPSHOT_BACKGROUND_REFRESH=False)
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        autocomplete.reset()
+        self.addCleanup(autocomplete.reset)
+        self.toys = Category.objects.create(category_name='Toys', slug='toys')
+        self.kite = Product.objects.create(
+            product_name='Red Kite', slug='red-kite', price=20, stock=5, category=self.toys, popularity=5,
+        )
+        Product.objects.create(product_name='Kite Reel', slug='kite-reel', price=5, stock=5, category=self.toys, popularity=9)
+        Product.objects.create(
+            product_name='Kitchen Set', slug='kitchen-set', price=30, stock=5, category=self.toys, is_available=False,
+        )
+
+    def _names(self, query):
+        return [result['name'] for result in self.client.get(f'/api/store/autocomplete/?q={query}').json()]
+
+    def test_prefix_matches_any_word_by_popularity_without_queries(self):
+        self.client.get('/api/store/autocomplete/?q=k')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/store/autocomplete/?q=KIT')
+        self.assertEqual(response.json(), [
+            {'type': 'product', 'name': 'Kite Reel', 'slug': 'kite-reel', 'category_slug': 'toys'},
+            {'type': 'product', 'name': 'Red Kite', 'slug': 'red-kite', 'category_slug': 'toys'},
+        ])
+        self.assertEqual(self._names('to'), ['Toys'])
+        self.assertEqual(self._names(''), [])
+
+    @override_settings(AUTOCOMPLETE_MAX_AGE=60)
+    def test_stale_index_is_served_while_one_thread_rebuilds_it(self):
+        autocomplete.build_index()
+        autocomplete._state['built_at'] -= 61
+        with mock.patch('store.autocomplete.threading.Thread') as thread, self.assertNumQueries(0):
+            self.assertEqual(self._names('red'), ['Red Kite'])
+            self.assertEqual(self._names('reel'), ['Kite Reel'])
+        thread.assert_called_once_with(target=autocomplete._refresh_index, daemon=True)
+
+    def test_signals_update_the_built_index(self):
+        autocomplete.build_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(product_name='Kite Pro', slug='kite-pro', price=50, stock=1, category=self.toys, popularity=20)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kite.product_name = 'Blue Glider'
+            self.kite.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.toys.category_name = 'Games'
+            self.toys.save()
+
+        self.assertEqual(self._names('kite'), ['Kite Pro', 'Kite Reel'])
+        self.assertEqual(self._names('glid'), ['Blue Glider'])
+        self.assertEqual(self._names('gam'), ['Games'])
+        self.assertEqual(self._names('toy'), [])
@@ -1,13 +1,16 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q
-from .models import Product, ReviewRating, ProductGallery
+from django.db.models import F, Q
+from .models import Product, ReviewRating, ProductGallery, REVIEWS_PAGE_SIZE
 from orders.models import OrderProduct
 from category.models import Category
 from carts.models import CartItem
-from carts.views import _cart_id
+from carts.views_legacy import _cart_id
+from .filters import apply_filters, apply_sort, get_facets, parse_filters
+from .analytics import record_product_view, record_search
 from .forms import ReviewForm
+from familyplus.db_router import use_read_replica
 
 
 def paginate_queryset(request, queryset, per_page=12, page_window=2):
@@ -30,41 +33,53 @@ def paginate_queryset(request, queryset, per_page=12, page_window=2):
         custom_range.append(total_pages)
     return paged_queryset, custom_range
 
+@use_read_replica()
 def store(request, category_slug=None):
     categories = None
+    params = request.GET.copy()
     if category_slug:
         categories = get_object_or_404(Category, slug=category_slug)
-        products = Product.objects.filter(category=categories, is_available=True).select_related('category')
-    else:
-        products = Product.objects.filter(is_available=True).order_by('id').select_related('category')
-    
+        params['category_slug'] = category_slug
+    try:
+        filters = parse_filters(params)
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        filters = parse_filters({'category_slug': category_slug or ''})
+    products = apply_sort(
+        apply_filters(Product.objects.filter(is_available=True), filters), filters['sort']
+    ).select_related('category')
+
     paged_products, custom_page_range = paginate_queryset(request, products)
-    sizes = ["XS", "S", "M", "L", "XL"]
-    colors = ["red", "blue", "green", "yellow"]
+    facets = get_facets(filters)
     context = {
         'products': paged_products,
-        'product_count': products.count(),
+        'product_count': paged_products.paginator.count,
         'category': categories,
         'custom_page_range': custom_page_range,
-        'sizes': sizes,
-        'colors': colors,
+        'sizes': [bucket['value'] for bucket in facets['size']],
+        'colors': [bucket['value'] for bucket in facets['color']],
+        'facets': facets,
+        'filters': filters,
     }
     return render(request, 'store/store.html', context)
 
 def product_detail(request, category_slug, product_slug):
     single_product = get_object_or_404(Product.objects.select_related('category'), category__slug=category_slug, slug=product_slug)
-    in_cart = CartItem.objects.filter(cart__cart_id=_cart_id(request), product=single_product).exists()
+    record_product_view(single_product.id)
+    cart_id = _cart_id(request, create=False)
+    # No session, no anonymous cart: cart__cart_id=None would match logged-in users' lines (cart is NULL)
+    in_cart = bool(cart_id) and CartItem.objects.filter(cart__cart_id=cart_id, product=single_product).exists()
     
     orderproduct = None
     if request.user.is_authenticated:
         orderproduct = OrderProduct.objects.filter(user=request.user, product=single_product).exists()
     
-    reviews = ReviewRating.objects.filter(product=single_product, status=True).select_related('user')
+    # The first page only; the rest is served by /api/store/products/<id>/reviews/
+    reviews = ReviewRating.objects.filter(product=single_product, status=True).select_related('user').annotate(
+        rating_half=F('rating') - 0.5
+    ).order_by('-created_at', '-id')[:REVIEWS_PAGE_SIZE]
     product_gallery = ProductGallery.objects.filter(product=single_product)
 
-    for review in reviews:
-        review.rating_half = review.rating - 0.5
-    
     star_range = range(1, 6)
     
     context = {
@@ -77,10 +92,12 @@ def product_detail(request, category_slug, product_slug):
     }
     return render(request, 'store/product_detail.html', context)
 
+@use_read_replica()
 def search(request):
     products = Product.objects.none()
     keyword = request.GET.get('keyword', '')
     if keyword:
+        record_search(keyword)
         products = Product.objects.filter(
             Q(description__icontains=keyword) | Q(product_name__icontains=keyword),
             is_available=True